@@ -0,0 +1,286 @@
+"""Hot-path benchmarks for simulation and rendering.
+
+Runs headless (SDL dummy video/audio drivers) and prints JSON with ms per call
+for each timed function, plus turns per second for full player turns, on the
+real start map and on synthetic maps holding N wandering bunnies (and N
+bandits chasing the player through scattered rocks). A mixed-speed bunny field
+also checks that the occupancy map still matches every entity's position after
+its turns (stacked or unindexed entities abort the run). The streamed test
+overworld (`maps.make_wilds`, not linked from the game's maps) adds the cost of
+re-anchoring its chunk window.
+
+    uv run python benchmarks/bench.py
+    uv run python benchmarks/bench.py --counts 10 100 --min-time 0.2 --out bench_output.txt
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+# Allow running from a plain checkout without installing the package
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+import pygame  # noqa: E402
+
+from csp.ai import enemy_ai  # noqa: E402
+from csp.chunks import CHUNK, stream_after_move  # noqa: E402
+from csp.common import Direction  # noqa: E402
+from csp.draw import draw_frame, draw_ui  # noqa: E402
+from csp.entities import Entity  # noqa: E402
+from csp.flags import set_flag, tick_flags  # noqa: E402
+from csp.graphics import COLORS, Graphics  # noqa: E402
+from csp.map_runtime import load_map  # noqa: E402
+from csp.maps import MapDef, _border_walls, make_wilds  # noqa: E402
+from csp.movement import can_move_to  # noqa: E402
+from csp.npc_index import set_entity_pos  # noqa: E402
+from csp.sim import new_game  # noqa: E402
+from csp.state import GameMode, State  # noqa: E402
+from csp.step import _do_player_move  # noqa: E402
+
+DEFAULT_COUNTS = (10, 100, 1_000, 10_000)
+DEFAULT_CHASERS = (10, 100, 1_000)
+DEFAULT_MIXED = (400,)
+# Speeds dealt out in turn to the bunnies of the mixed-speed field
+MIXED_SPEEDS = (50, 150, 100)
+
+
+def time_calls(fn: Callable[[], object], min_time: float) -> tuple[int, float]:
+    """Call fn repeatedly for at least min_time seconds; return (calls, seconds)."""
+    fn()  # warm caches (sprites, text, static layer) outside the timed window
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+    return calls, elapsed
+
+
+def bunny_map(count: int, seed: int, speeds: tuple[int, ...] = (100,)) -> MapDef:
+    """A square bordered field with `count` random-walking bunnies.
+
+    The player's row starts clear so full turns have room to step left/right.
+    Bunnies take their speeds from `speeds` in turn.
+    """
+    side = max(24, int((count * 4) ** 0.5) + 2)  # ~25% of cells occupied
+    walls = _border_walls(side, side)
+    rng = random.Random(seed)
+    mid = side // 2
+    cells = [(x, y) for y in range(1, side - 1) for x in range(1, side - 1) if y != mid]
+    bunnies = []
+    for i, (x, y) in enumerate(rng.sample(cells, count)):
+        b = Entity(x, y, "b", COLORS["bunny"], "Bunny", "Harmless fluff", behavior="random")
+        b.speed = speeds[i % len(speeds)]
+        b.attackable = True
+        b.health = 1
+        bunnies.append(b)
+    return MapDef(
+        id=f"bench_{count}", name=f"Bench {count}", size=(side, side), walls=walls, enemies=bunnies
+    )
+
+
+def chaser_map(count: int, seed: int) -> MapDef:
+    """Like `bunny_map` but with `count` chasing bandits and rocks to route around."""
+    m = bunny_map(count, seed)
+    side = m.size[0]
+    rng = random.Random(seed + 1)
+    taken = {(e.x, e.y) for e in m.enemies}
+    mid = side // 2
+    for _ in range(side * side // 12):
+        pos = (rng.randrange(1, side - 1), rng.randrange(1, side - 1))
+        if pos not in taken and pos[1] != mid:
+            m.walls.add(pos)
+    for e in m.enemies:
+        e.char, e.color, e.name, e.behavior = "B", (200, 60, 60), "Bandit", "chase"
+    m.id, m.name = f"bench_chase_{count}", f"Bench chase {count}"
+    return m
+
+
+def bench_state(map_def: MapDef | None) -> State:
+    state = State()
+    if map_def is None:
+        new_game(state)
+    else:
+        state.maps[map_def.id] = map_def
+        cols, rows = map_def.size
+        # Streamed maps start on their own spawn (the grid is only the live window)
+        spawn = None if map_def.stream is not None else (cols // 2, rows // 2)
+        load_map(state, map_def.id, spawn_pos=spawn)
+    state.mode = GameMode.PLAYING
+    return state
+
+
+def run_scenario(
+    label: str, map_def: MapDef | None, gfx: Graphics, min_time: float
+) -> list[dict[str, object]]:
+    results: list[dict[str, object]] = []
+    entities = len(map_def.enemies) if map_def is not None else None
+
+    def record(name: str, fn: Callable[[], object], turns: Callable[[], int] | None = None) -> None:
+        before = turns() if turns else 0
+        calls, secs = time_calls(fn, min_time)
+        row: dict[str, object] = {
+            "scenario": label,
+            "entities": entities,
+            "name": name,
+            "calls": calls,
+            "ms_per_call": round(secs * 1000.0 / calls, 4),
+        }
+        if turns is not None:
+            row["turns_per_sec"] = round((turns() - before) / secs, 1)
+        results.append(row)
+
+    state = bench_state(map_def)
+    map_id = state.current_map_id or ""
+    px, py = state.player.x, state.player.y
+    # Spawn positions are world cells on streamed maps
+    ox, oy = state.stream_origin
+    spawn = (px + ox, py + oy)
+
+    def fresh_load() -> None:
+        # Nothing to park or swap back in: build the runtime from the definition
+        state.current_map_id = None
+        state.parked_maps.clear()
+        load_map(state, map_id, spawn)
+
+    record("map_runtime.load_map", fresh_load)
+    # Re-entering a map parks the runtime and swaps it straight back in
+    record("map_runtime.load_map_parked", lambda: load_map(state, map_id, spawn))
+
+    state = bench_state(map_def)
+    record("draw.draw_frame", lambda: draw_frame(state, gfx.screen, gfx.font))
+    record("draw.draw_ui", lambda: draw_ui(state, gfx.screen, gfx.font))
+    record("movement.can_move_to", lambda: can_move_to(state, px + 1, py))
+    for i in range(20):
+        set_flag(state, f"bench.timer_{i}", scope="map", duration_steps=1_000_000)
+    record("flags.tick_flags", lambda: tick_flags(state))
+
+    state = bench_state(map_def)
+    record("ai.enemy_ai", lambda: enemy_ai(state))
+
+    state = bench_state(map_def)
+    order = [Direction.LEFT, Direction.LEFT, Direction.RIGHT, Direction.RIGHT]
+    step = [0]
+
+    def open_side(first: Direction) -> Direction | None:
+        p = state.player
+        sides: list[Direction] = [first, *Direction]
+        for d in sides:
+            dx, dy = d.value
+            if can_move_to(state, p.x + dx, p.y + dy):
+                return d
+        return None
+
+    def turn() -> None:
+        # Shuffle left/right; if wandering bunnies block the way, take any open side
+        step[0] += 1
+        d = open_side(order[step[0] % len(order)])
+        while d is None:
+            # Boxed in (chasers close in fast): drop the player on a random open
+            # cell, so that every call completes one full turn
+            cols, rows = state.map_cols, state.map_rows
+            x, y = random.randrange(cols), random.randrange(rows)
+            if can_move_to(state, x, y):
+                set_entity_pos(state, state.player, x, y)
+                d = open_side(Direction.LEFT)
+        _do_player_move(state, d)
+        # Dying ends the run; keep measuring turns rather than a dead player
+        state.player.health = 20
+        state.mode = GameMode.PLAYING
+
+    record("step._do_player_move", turn, turns=lambda: state.turn_count)
+    check_occupancy(label, state)
+
+    if map_def is not None and map_def.stream is not None:
+        state = bench_state(map_def)
+
+        def cross_chunk() -> None:
+            # Hop one chunk east onto open ground; the window re-anchors around it,
+            # generating new chunks and evicting (or spilling) old ones
+            x, y = state.player.x + CHUNK, state.player.y
+            rows = state.map_rows
+            y = next(y2 % rows for y2 in range(y, y + rows) if can_move_to(state, x, y2 % rows))
+            set_entity_pos(state, state.player, x, y)
+            stream_after_move(state)
+
+        record("chunks.stream_after_move", cross_chunk)
+        check_occupancy(label, state)
+    return results
+
+
+def check_occupancy(label: str, state: State) -> None:
+    """Fail the run if the occupancy map and entity positions disagree."""
+    entities = (*state.npcs, state.player)
+    cells = {(e.x, e.y) for e in entities}
+    stacked = len(entities) - len(cells)
+    missing = sum(
+        1 for e in entities if not any(o is e for o in state.occupancy.get((e.x, e.y), ()))
+    )
+    indexed = sum(len(here) for here in state.occupancy.values())
+    if stacked or missing or indexed != len(entities):
+        raise SystemExit(
+            f"{label}: occupancy out of sync ({stacked} stacked, {missing} missing, "
+            f"{indexed} indexed for {len(entities)} entities)"
+        )
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--counts", type=int, nargs="*", default=list(DEFAULT_COUNTS))
+    ap.add_argument("--chasers", type=int, nargs="*", default=list(DEFAULT_CHASERS))
+    ap.add_argument("--mixed", type=int, nargs="*", default=list(DEFAULT_MIXED))
+    ap.add_argument("--min-time", type=float, default=0.5, help="seconds per measurement")
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--out", type=Path, default=None, help="write JSON here instead of stdout")
+    args = ap.parse_args(argv)
+
+    pygame.init()
+    gfx = Graphics.create()
+    random.seed(args.seed)
+
+    results = run_scenario("start_area", None, gfx, args.min_time)
+    random.seed(args.seed)
+    results.extend(run_scenario("wilds", make_wilds(args.seed), gfx, args.min_time))
+    for n in args.counts:
+        random.seed(args.seed)
+        results.extend(run_scenario(f"bunnies_{n}", bunny_map(n, args.seed), gfx, args.min_time))
+    for n in args.chasers:
+        random.seed(args.seed)
+        results.extend(run_scenario(f"chasers_{n}", chaser_map(n, args.seed), gfx, args.min_time))
+    for n in args.mixed:
+        random.seed(args.seed)
+        m = bunny_map(n, args.seed, MIXED_SPEEDS)
+        results.extend(run_scenario(f"bunnies_mixed_{n}", m, gfx, args.min_time))
+
+    report = {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "min_time_s": args.min_time,
+        "seed": args.seed,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out is not None:
+        args.out.write_text(text + "\n")
+    else:
+        print(text)
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from csp.map_runtime import open_start_left_path
 from csp.flags import set_flag
+from csp.messages import log
 from csp.state import State
 
 
@@ -10,4 +11,4 @@ def perform_dialogue_action(state: State, action: str) -> None:
         set_flag(state, "start_area.riddle_solved", scope="global", duration_steps=None)
         open_start_left_path(state)
     else:
-        state.message_log.append(f"[debug] Unknown action: {action}")
+        log(state, f"[debug] Unknown action: {action}")
@@ -1,60 +1,139 @@
 from __future__ import annotations
 
 import random
+from collections.abc import Callable
 
+from csp.entities import Entity
 from csp.graphics import COLS, ROWS
-from csp.movement import move_entity
+from csp.movement import can_move_to, move_entity
+from csp.npc_index import npcs_with_behavior, set_entity_pos
+from csp.fov import can_see
 from csp.gameplay import damage_player
+from csp.pathfinding import player_distance_field
+from csp.random_walk import random_walk
+from csp.scheduler import ACTION_COST, TURN, pop_due, schedule_many
 from csp.state import State
 
+_STEPS: tuple[tuple[int, int], ...] = ((1, 0), (-1, 0), (0, 1), (0, -1))
+# How far pigs and awake bears can spot the player (walls block sight)
+PIG_SIGHT: int = 10
+BEAR_SIGHT: int = 12
+# Energy a pig bite costs: two steps' worth, so a charging pig bites at most once a turn
+BITE_COST: int = 2 * ACTION_COST
 
-def enemy_ai(state: State) -> None:
-    movers = [e for e in state.npcs if getattr(e, "behavior", None) in ("random", "chase", "phase", "pig", "bear_sleep", "bear")]
-    for enemy in list(movers):
-        if enemy.behavior == "random":
-            dx, dy = random.choice([(0, 1), (0, -1), (1, 0), (-1, 0)])
+
+def _toward_player_dirs(state: State, enemy) -> tuple[tuple[int, int], tuple[int, int]]:
+    """The two greedy steps toward the player, larger axis gap first."""
+    dx = 1 if state.player.x > enemy.x else (-1 if state.player.x < enemy.x else 0)
+    dy = 1 if state.player.y > enemy.y else (-1 if state.player.y < enemy.y else 0)
+    if abs(state.player.x - enemy.x) >= abs(state.player.y - enemy.y):
+        return (dx, 0), (0, dy)
+    return (0, dy), (dx, 0)
+
+
+def _greedy_step(state: State, enemy) -> None:
+    first, second = _toward_player_dirs(state, enemy)
+    if not move_entity(state, enemy, *first):
+        move_entity(state, enemy, *second)
+
+
+def _chase_step(state: State, enemy) -> None:
+    """Step one tile down the shared player distance field.
+
+    Enemies the field cannot reach (cut off from the player) fall back to the
+    greedy step; if every downhill tile is taken by another entity they wait.
+    """
+    cols, rows = state.map_cols, state.map_rows
+    if not (0 <= enemy.x < cols and 0 <= enemy.y < rows):
+        _greedy_step(state, enemy)
+        return
+    dist = player_distance_field(state)
+    here = dist[enemy.y * cols + enemy.x]
+    if here < 0:
+        _greedy_step(state, enemy)
+        return
+    # Prefer the greedy directions when they are also downhill; detours otherwise
+    for dx, dy in (*_toward_player_dirs(state, enemy), *_STEPS):
+        nx, ny = enemy.x + dx, enemy.y + dy
+        if not (0 <= nx < cols and 0 <= ny < rows):
+            continue
+        d = dist[ny * cols + nx]
+        if 0 <= d < here and can_move_to(state, nx, ny, ignore_entity=enemy):
             move_entity(state, enemy, dx, dy)
-        elif enemy.behavior == "chase":
-            dx = 1 if state.player.x > enemy.x else -1
-            dy = 1 if state.player.y > enemy.y else -1
-            # Move in x direction first
-            if not move_entity(state, enemy, dx, 0):
-                move_entity(state, enemy, 0, dy)
-        elif enemy.behavior == "phase":
-            # Ignores walls entirely
-            enemy.x = (enemy.x + random.choice([-1, 1])) % COLS
-            enemy.y = (enemy.y + random.choice([-1, 1])) % ROWS
-        elif enemy.behavior == "pig":
-            # If within 10 tiles (Manhattan), charge toward player (up to 2 steps)
-            dist = abs(state.player.x - enemy.x) + abs(state.player.y - enemy.y)
-            if dist <= 10:
-                for _ in range(2):
-                    dx = 1 if state.player.x > enemy.x else (-1 if state.player.x < enemy.x else 0)
-                    dy = 1 if state.player.y > enemy.y else (-1 if state.player.y < enemy.y else 0)
-                    if abs(state.player.x - enemy.x) >= abs(state.player.y - enemy.y):
-                        if not move_entity(state, enemy, dx, 0):
-                            move_entity(state, enemy, 0, dy)
-                    else:
-                        if not move_entity(state, enemy, 0, dy):
-                            move_entity(state, enemy, dx, 0)
-                # Bite if adjacent
-                if abs(state.player.x - enemy.x) + abs(state.player.y - enemy.y) == 1:
-                    damage_player(state, 1, source=f"{enemy.name} bite")
-        elif enemy.behavior in ("bear_sleep", "bear"):
-            if enemy.behavior == "bear_sleep":
-                # Do nothing until woken by noise
-                continue
-            # Bear is awake: slow chase (1 step)
-            dx = 1 if state.player.x > enemy.x else (-1 if state.player.x < enemy.x else 0)
-            dy = 1 if state.player.y > enemy.y else (-1 if state.player.y < enemy.y else 0)
-            if abs(state.player.x - enemy.x) >= abs(state.player.y - enemy.y):
-                if not move_entity(state, enemy, dx, 0):
-                    move_entity(state, enemy, 0, dy)
-            else:
-                if not move_entity(state, enemy, 0, dy):
-                    move_entity(state, enemy, dx, 0)
-            if abs(state.player.x - enemy.x) + abs(state.player.y - enemy.y) == 1:
-                damage_player(state, 2, source=f"{enemy.name} swipe")
+            return
+
+
+def enemy_ai(state: State) -> None:
+    """Advance the npcs one player turn: everyone due by then acts, in due order.
+
+    Random walkers due on the same tick move first, together (batched for
+    large crowds); the rest act one by one in scheduling order.
+    """
+    sched = state.scheduler
+    end = sched.now + TURN
+    while (hit := pop_due(sched, end)) is not None:
+        sched.now, actors = hit
+        walkers = [e for e in actors if e.behavior == "random"]
+        if walkers:
+            random_walk(state, walkers)
+            schedule_many(sched, walkers)
+        if len(walkers) == len(actors):
+            continue
+        # Energy spent -> actors that spent it, rescheduled together
+        spent: dict[int, list[Entity]] = {}
+        for e in actors:
+            act = _ACTIONS.get(e.behavior)
+            if act is not None:
+                spent.setdefault(act(state, e), []).append(e)
+        for cost, group in spent.items():
+            schedule_many(sched, group, cost)
+    sched.now = end
+
+
+def _phase_act(state: State, enemy: Entity) -> int:
+    # Ignores walls entirely
+    nx = (enemy.x + random.choice([-1, 1])) % COLS
+    ny = (enemy.y + random.choice([-1, 1])) % ROWS
+    set_entity_pos(state, enemy, nx, ny)
+    return ACTION_COST
+
+
+def _chase_act(state: State, enemy: Entity) -> int:
+    _chase_step(state, enemy)
+    return ACTION_COST
+
+
+def _pig_act(state: State, enemy: Entity) -> int:
+    # If within 10 tiles (Manhattan) and in sight, charge toward the player (speed 200:
+    # two steps a turn); a bite ends the charge for the turn
+    dist = abs(state.player.x - enemy.x) + abs(state.player.y - enemy.y)
+    if dist <= PIG_SIGHT and can_see(
+        state, (enemy.x, enemy.y), (state.player.x, state.player.y), PIG_SIGHT
+    ):
+        _chase_step(state, enemy)
+        if abs(state.player.x - enemy.x) + abs(state.player.y - enemy.y) == 1:
+            damage_player(state, 1, source=f"{enemy.name} bite")
+            return BITE_COST
+    return ACTION_COST
+
+
+def _bear_act(state: State, enemy: Entity) -> int:
+    # Sleeping bears (bear_sleep) are not scheduled until woken by noise.
+    # Awake: slow chase (1 step) while it can see the player
+    if can_see(state, (enemy.x, enemy.y), (state.player.x, state.player.y), BEAR_SIGHT):
+        _chase_step(state, enemy)
+    if abs(state.player.x - enemy.x) + abs(state.player.y - enemy.y) == 1:
+        damage_player(state, 2, source=f"{enemy.name} swipe")
+    return ACTION_COST
+
+
+# behavior -> action; returns the energy spent (see csp.scheduler)
+_ACTIONS: dict[str | None, Callable[[State, Entity], int]] = {
+    "chase": _chase_act,
+    "phase": _phase_act,
+    "pig": _pig_act,
+    "bear": _bear_act,
+}
 
 
 def append_debug_shapes(state: State) -> None:
@@ -63,16 +142,15 @@ def append_debug_shapes(state: State) -> None:
     Example: for pigs, draw a yellow detection AABB representing their charge range.
     """
     # Pig detection radius (Manhattan) is 10; show a bounding rect for quick visualization
-    for e in state.npcs:
-        if getattr(e, "behavior", None) == "pig":
-            r = 10
-            x1, y1 = e.x - r, e.y - r
-            x2, y2 = e.x + r, e.y + r
-            state.debug_shapes.append(
-                {
-                    "type": "rect",
-                    "aabb": ((x1, y1), (x2, y2)),
-                    "color": (255, 255, 0),
-                    "label": "pig range",
-                }
-            )
+    for e in npcs_with_behavior(state, "pig"):
+        r = 10
+        x1, y1 = e.x - r, e.y - r
+        x2, y2 = e.x + r, e.y + r
+        state.debug_shapes.append(
+            {
+                "type": "rect",
+                "aabb": ((x1, y1), (x2, y2)),
+                "color": (255, 255, 0),
+                "label": "pig range",
+            }
+        )
@@ -0,0 +1,176 @@
+"""Headless multi-seed playthroughs (`game-batch`).
+
+Plays N independent games through `csp.sim`, one seed each, spread over a
+process pool (one worker per core by default). Each finished run is written as
+one JSON line as soon as it completes: turns survived, gold, death and its
+source, global flags reached and maps visited. A one-line summary of deaths by
+source goes to stderr.
+
+    uv run game-batch --runs 200 --policy explore --start forest_b --out pig.jsonl
+
+Policies:
+- `random`: uniform over moves, punch and interact (dialogue options at random)
+- `explore`: walks straight until blocked, punches hostiles in reach, and
+  sometimes talks to whoever is next to it
+
+Runs are reproducible: run i uses seed `--seed + i` for both the game's
+`random` module and the policy.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import IO
+
+# Workers never open a window; keep pygame's banner out of the JSONL stream
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from csp.common import Direction
+from csp.map_runtime import load_map
+from csp.sim import Action, apply_action, new_game
+from csp.state import GameMode, State
+from csp.worldgraph import world_graph
+
+DEFAULT_RUNS = 8
+DEFAULT_MAX_ACTIONS = 5_000
+
+# (state, rng, memo) -> next action; memo is per-run scratch space
+Policy = Callable[[State, random.Random, dict[str, object]], Action]
+
+_MOVES = tuple(Action("move", direction=d) for d in Direction)
+_RANDOM_ACTIONS = (*_MOVES, Action("punch"), Action("interact"))
+
+
+def random_policy(state: State, rng: random.Random, memo: dict[str, object]) -> Action:
+    return rng.choice(_RANDOM_ACTIONS)
+
+
+def explore_policy(state: State, rng: random.Random, memo: dict[str, object]) -> Action:
+    p = state.player
+    for e in state.npcs:
+        if e.attackable and e.alignment == "hostile":
+            if abs(e.x - p.x) <= 1 and abs(e.y - p.y) <= 1:
+                return Action("punch")
+    if rng.random() < 0.05:
+        return Action("interact")
+    heading = memo.get("heading")
+    if heading is None or memo.get("blocked") or rng.random() < 0.1:
+        heading = rng.choice(list(Direction))
+        memo["heading"] = heading
+    return Action("move", direction=heading)  # type: ignore[arg-type]
+
+
+POLICIES: dict[str, Policy] = {
+    "random": random_policy,
+    "explore": explore_policy,
+}
+
+
+def entrance(state: State, map_id: str) -> tuple[int, int] | None:
+    """Where a warp into `map_id` drops the player (None if nothing leads there)."""
+    spots = world_graph(state).arrivals.get(map_id)
+    return spots[0] if spots else None
+
+
+def run_one(seed: int, policy: str, start: str | None, max_actions: int) -> dict[str, object]:
+    """Play one game to death or `max_actions` player actions and summarize it."""
+    random.seed(seed)
+    rng = random.Random(seed)
+    choose = POLICIES[policy]
+    t0 = time.perf_counter()
+    state = State()
+    new_game(state)
+    if start is not None:
+        load_map(state, start, spawn_pos=entrance(state, start))
+    state.mode = GameMode.PLAYING
+    maps = {state.current_map_id}
+    memo: dict[str, object] = {}
+    actions = 0
+    while actions < max_actions and state.mode != GameMode.DEAD:
+        if state.mode == GameMode.DIALOGUE:
+            action = Action("choose", index=rng.randrange(max(1, _dialogue_options(state))))
+        elif state.mode != GameMode.PLAYING:
+            # Shop/inventory screens: back out, as Esc would
+            state.mode = GameMode.PLAYING
+            continue
+        else:
+            action = choose(state, rng, memo)
+        events = apply_action(state, action)
+        memo["blocked"] = any(ev.kind == "blocked" for ev in events)
+        maps.add(state.current_map_id)
+        actions += 1
+    return {
+        "seed": seed,
+        "policy": policy,
+        "start": start or "start_area",
+        "actions": actions,
+        "turns": state.turn_count,
+        "died": state.mode == GameMode.DEAD,
+        "death_cause": state.death_cause,
+        "health": state.player.health,
+        "gold": state.player.gold,
+        "flags": sorted(state.flags_global),
+        "maps": sorted(m for m in maps if m),
+        "final_map": state.current_map_id,
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
+
+
+def _dialogue_options(state: State) -> int:
+    tree = state.dialogues.get(state.dialogue_id or "", {})
+    node = tree.get("nodes", {}).get(state.dialogue_node or "", {})
+    return len(node.get("options", []))
+
+
+def _emit(out: IO[str], row: dict[str, object], deaths: Counter[str]) -> None:
+    out.write(json.dumps(row) + "\n")
+    out.flush()
+    if row["died"]:
+        deaths[str(row["death_cause"])] += 1
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    ap.add_argument("--seed", type=int, default=0, help="seed of the first run")
+    ap.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    ap.add_argument("--start", default=None, help="map id to start on (default start_area)")
+    ap.add_argument("--max-actions", type=int, default=DEFAULT_MAX_ACTIONS)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--out", type=Path, default=None, help="write JSONL here instead of stdout")
+    args = ap.parse_args(argv)
+    if args.start is not None and args.start not in State().maps:
+        ap.error(f"unknown map id: {args.start}")
+
+    jobs = [(args.seed + i, args.policy, args.start, args.max_actions) for i in range(args.runs)]
+    deaths: Counter[str] = Counter()
+    out = args.out.open("w") if args.out is not None else sys.stdout
+    try:
+        if args.workers <= 1:
+            for job in jobs:
+                _emit(out, run_one(*job), deaths)
+        else:
+            with ProcessPoolExecutor(max_workers=args.workers) as pool:
+                futures = [pool.submit(run_one, *job) for job in jobs]
+                for fut in as_completed(futures):
+                    _emit(out, fut.result(), deaths)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    causes = ", ".join(f"{cause}: {n}" for cause, n in deaths.most_common()) or "none"
+    print(f"{args.runs} runs, {sum(deaths.values())} deaths ({causes})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""Chunked, streamed maps for overworlds bigger than one resident grid.
+
+A streamed map (`MapDef.stream`) is an unbounded world cut into CHUNK x CHUNK
+chunks, each holding its slice of the tile grids, its placed tiles and the npcs
+standing in it. Only a WINDOW x WINDOW block of chunks around the player is
+live: it is assembled into the ordinary per-map runtime (tile grids,
+`map_tiles`, `npcs`), so movement, AI, FOV, lighting and drawing work on it
+unchanged. With the player in the window's center chunk the camera never sees
+past the window. When the player steps into another chunk the window is written
+back to its chunks and rebuilt around the new one; world coordinates stay put
+and map-local ones shift (`state.stream_origin` is the window's top-left world
+cell, so world = local + origin).
+
+Chunks come from a `ChunkStore`: an LRU of resident chunks under a byte budget.
+A chunk is generated from (seed, cx, cy) the first time it is needed. Evicted
+chunks that were never live are dropped, since they regenerate identically;
+chunks the player has been near may have changed (dead bunnies, taken torches),
+so they are pickled to a spill directory and read back on return. Unless one is
+given, the spill directory is a temporary one owned by the store: it is removed
+when the store is garbage collected or the interpreter exits.
+"""
+
+from __future__ import annotations
+
+import pickle
+import tempfile
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from csp.npc_index import rebuild_npc_index
+from csp.tilegrid import install_tile_grid
+
+if TYPE_CHECKING:
+    from csp.entities import Entity
+    from csp.maps import MapDef
+    from csp.state import State
+    from csp.tiles import Tile
+
+# Cells per chunk side
+CHUNK: int = 32
+# Live chunks per window side (odd; the player stays in the middle one)
+WINDOW: int = 3
+# Resident chunk budget; roughly 3 KiB per chunk plus its npcs and tiles
+DEFAULT_BUDGET: int = 4 << 20
+# Rough per-object cost for npcs and placed tiles in the budget
+_OBJECT_BYTES: int = 256
+
+
+@dataclass
+class Chunk:
+    cx: int
+    cy: int
+    # Tile kind / collision per cell, index y * CHUNK + x (see csp.tilegrid)
+    kinds: bytearray = field(default_factory=lambda: bytearray(CHUNK * CHUNK))
+    collision: bytearray = field(default_factory=lambda: bytearray(CHUNK * CHUNK))
+    # Placed tiles and npcs, in world coordinates
+    tiles: dict[tuple[int, int], Tile] = field(default_factory=dict)
+    npcs: list[Entity] = field(default_factory=list)
+    # Has been part of the live window (may differ from what the generator makes)
+    touched: bool = False
+
+
+# (seed, cx, cy) -> freshly generated chunk
+ChunkGenerator = Callable[[int, int, int], Chunk]
+
+
+@dataclass
+class ChunkStore:
+    seed: int
+    generate: ChunkGenerator
+    # World cell a plain load (no spawn position) puts the player on
+    spawn: tuple[int, int] = (0, 0)
+    budget_bytes: int = DEFAULT_BUDGET
+    # Where touched chunks go on eviction (a temp dir is made on first use)
+    spill_dir: Path | None = None
+    # The temp dir made for spill_dir, deleted along with the store
+    spill_tmp: tempfile.TemporaryDirectory[str] | None = field(default=None, repr=False)
+    resident: OrderedDict[tuple[int, int], Chunk] = field(default_factory=OrderedDict)
+    nbytes: int = 0
+    spilled: set[tuple[int, int]] = field(default_factory=set)
+    # Chunks of the live window; never evicted
+    pinned: set[tuple[int, int]] = field(default_factory=set)
+
+
+def chunk_of(x: int, y: int) -> tuple[int, int]:
+    return x // CHUNK, y // CHUNK
+
+
+def chunk_nbytes(chunk: Chunk) -> int:
+    return (
+        len(chunk.kinds)
+        + len(chunk.collision)
+        + _OBJECT_BYTES * (len(chunk.tiles) + len(chunk.npcs))
+    )
+
+
+def get_chunk(store: ChunkStore, cx: int, cy: int) -> Chunk:
+    """Return a chunk, from memory, the spill directory, or the generator."""
+    key = (cx, cy)
+    chunk = store.resident.get(key)
+    if chunk is not None:
+        store.resident.move_to_end(key)
+        return chunk
+    if key in store.spilled and store.spill_dir is not None:
+        with open(_spill_path(store, key), "rb") as f:
+            chunk = pickle.load(f)
+    else:
+        chunk = store.generate(store.seed, cx, cy)
+    store.resident[key] = chunk
+    store.nbytes += chunk_nbytes(chunk)
+    evict_chunks(store)
+    return chunk
+
+
+def evict_chunks(store: ChunkStore) -> None:
+    """Drop or spill least recently used, unpinned chunks until under budget."""
+    if store.nbytes <= store.budget_bytes:
+        return
+    for key in list(store.resident):
+        if store.nbytes <= store.budget_bytes:
+            break
+        if key in store.pinned:
+            continue
+        chunk = store.resident.pop(key)
+        store.nbytes -= chunk_nbytes(chunk)
+        if chunk.touched:
+            if store.spill_dir is None:
+                store.spill_tmp = tempfile.TemporaryDirectory(prefix="csp-chunks-")
+                store.spill_dir = Path(store.spill_tmp.name)
+            with open(_spill_path(store, key), "wb") as f:
+                pickle.dump(chunk, f, protocol=pickle.HIGHEST_PROTOCOL)
+            store.spilled.add(key)
+
+
+def enter_stream(state: State, m: MapDef, world_pos: tuple[int, int] | None) -> None:
+    """Build the live window for a streamed map around `world_pos` and place the player."""
+    store = m.stream
+    assert store is not None
+    wx, wy = world_pos if world_pos is not None else store.spawn
+    _assemble(state, m, *chunk_of(wx, wy))
+    ox, oy = state.stream_origin
+    state.player.x, state.player.y = wx - ox, wy - oy
+    rebuild_npc_index(state)
+
+
+def leave_stream(state: State, m: MapDef) -> None:
+    """Write the live window back to its chunks (before another map loads)."""
+    store = m.stream
+    assert store is not None
+    _write_back(state, store)
+    store.pinned.clear()
+    evict_chunks(store)
+
+
+def stream_after_move(state: State) -> None:
+    """Re-anchor the window if the player left its center chunk."""
+    m = state.maps.get(state.current_map_id or "")
+    if m is None or m.stream is None:
+        return
+    ox, oy = state.stream_origin
+    wx, wy = state.player.x + ox, state.player.y + oy
+    center = ox // CHUNK + WINDOW // 2, oy // CHUNK + WINDOW // 2
+    if chunk_of(wx, wy) == center:
+        return
+    _write_back(state, m.stream)
+    _assemble(state, m, *chunk_of(wx, wy))
+    ox, oy = state.stream_origin
+    state.player.x, state.player.y = wx - ox, wy - oy
+    rebuild_npc_index(state)
+
+
+def _assemble(state: State, m: MapDef, ccx: int, ccy: int) -> None:
+    store = m.stream
+    assert store is not None
+    size = WINDOW * CHUNK
+    x0c, y0c = ccx - WINDOW // 2, ccy - WINDOW // 2
+    ox, oy = x0c * CHUNK, y0c * CHUNK
+    store.pinned = {(x0c + i, y0c + j) for j in range(WINDOW) for i in range(WINDOW)}
+    kinds = bytearray(size * size)
+    coll = bytearray(size * size)
+    tiles: dict[tuple[int, int], Tile] = {}
+    npcs: list[Entity] = []
+    for j in range(WINDOW):
+        for i in range(WINDOW):
+            chunk = get_chunk(store, x0c + i, y0c + j)
+            chunk.touched = True
+            # Live tiles and npcs are owned by the state until written back
+            store.nbytes -= chunk_nbytes(chunk)
+            for r in range(CHUNK):
+                dst = (j * CHUNK + r) * size + i * CHUNK
+                src = r * CHUNK
+                kinds[dst : dst + CHUNK] = chunk.kinds[src : src + CHUNK]
+                coll[dst : dst + CHUNK] = chunk.collision[src : src + CHUNK]
+            for (x, y), tile in chunk.tiles.items():
+                tiles[(x - ox, y - oy)] = tile
+            for e in chunk.npcs:
+                e.x -= ox
+                e.y -= oy
+                npcs.append(e)
+            chunk.tiles = {}
+            chunk.npcs = []
+            store.nbytes += chunk_nbytes(chunk)
+    state.stream_origin = (ox, oy)
+    state.map_cols = state.map_rows = size
+    state.map_tiles = tiles
+    state.npcs = npcs
+    state.map_warps = {
+        (x - ox, y - oy): w
+        for (x, y), w in m.warps.items()
+        if 0 <= x - ox < size and 0 <= y - oy < size
+    }
+    install_tile_grid(state, kinds, coll)
+
+
+def _write_back(state: State, store: ChunkStore) -> None:
+    size = WINDOW * CHUNK
+    ox, oy = state.stream_origin
+    x0c, y0c = ox // CHUNK, oy // CHUNK
+    chunks = {
+        (i, j): get_chunk(store, x0c + i, y0c + j) for j in range(WINDOW) for i in range(WINDOW)
+    }
+    store.nbytes -= sum(chunk_nbytes(c) for c in chunks.values())
+    for (i, j), chunk in chunks.items():
+        for r in range(CHUNK):
+            src = (j * CHUNK + r) * size + i * CHUNK
+            dst = r * CHUNK
+            chunk.kinds[dst : dst + CHUNK] = state.tile_kinds[src : src + CHUNK]
+            chunk.collision[dst : dst + CHUNK] = state.collision[src : src + CHUNK]
+    for (x, y), tile in state.map_tiles.items():
+        chunks[(x // CHUNK, y // CHUNK)].tiles[(x + ox, y + oy)] = tile
+    for e in state.npcs:
+        # Npcs never leave the window (its edge blocks like a wall)
+        i = max(0, min(e.x // CHUNK, WINDOW - 1))
+        j = max(0, min(e.y // CHUNK, WINDOW - 1))
+        chunk = chunks[(i, j)]
+        e.x += ox
+        e.y += oy
+        chunk.npcs.append(e)
+    store.nbytes += sum(chunk_nbytes(c) for c in chunks.values())
+    state.npcs = []
+    state.map_tiles = {}
+
+
+def _spill_path(store: ChunkStore, key: tuple[int, int]) -> Path:
+    assert store.spill_dir is not None
+    return store.spill_dir / f"{key[0]}_{key[1]}.pkl"
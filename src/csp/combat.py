@@ -2,7 +2,9 @@ from __future__ import annotations
 
 from csp.state import State
 from csp.flags import set_flag
+from csp.fov import field_of_view
 from csp.messages import log
+from csp.npc_index import remove_npc
 
 
 def handle_combat(state: State) -> None:
@@ -13,13 +15,16 @@ def handle_combat(state: State) -> None:
 
 def perform_attack(state: State, attack_name: str, dmg: int, rng: int, sound_key: str) -> None:
     targets = []
+    # No hitting or shooting through walls (radius covers the corners of the range box)
+    visible = field_of_view(state, state.player.x, state.player.y, rng + 1)
     for e in state.npcs:
         if not getattr(e, "attackable", False):
             continue
         if getattr(e, "alignment", "neutral") == "ally":
             continue
         if abs(e.x - state.player.x) <= rng and abs(e.y - state.player.y) <= rng:
-            targets.append(e)
+            if (e.x, e.y) in visible:
+                targets.append(e)
     if targets:
         target = targets[0]
         target.health -= dmg
@@ -45,9 +50,6 @@ def perform_attack(state: State, attack_name: str, dmg: int, rng: int, sound_key
                 set_flag(state, "forest_b.pig_dead", scope="global", duration_steps=None)
             if target.name == "Bear":
                 set_flag(state, "forest_c.bear_dead", scope="global", duration_steps=None)
-            try:
-                state.npcs.remove(target)
-            except ValueError:
-                pass
+            remove_npc(state, target)
     else:
         log(state, f"No target in range for {attack_name}.")
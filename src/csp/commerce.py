@@ -8,13 +8,14 @@ from csp.common import is_adjacent
 from csp.state import State, GameMode
 from csp.shops import ShopItem
 from csp.messages import log
+from csp.npc_index import find_npc
 from csp.items import cleanup_zero_qty_items
 
 
 def handle_commerce(state: State) -> None:
     # Look for adjacent trader or shop NPCs
-    trader = next((e for e in state.npcs if e.behavior == "trader"), None)
-    shop = next((e for e in state.npcs if e.behavior == "shop"), None)
+    trader = find_npc(state, behavior="trader")
+    shop = find_npc(state, behavior="shop")
     if trader and is_adjacent(state.player, trader):
         trade_with_trapper(state)
     elif shop and is_adjacent(state.player, shop):
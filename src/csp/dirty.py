@@ -0,0 +1,59 @@
+"""Dirty-region tracking for partial display updates.
+
+Draw code records every region it paints under a stable key together with a
+signature of what it showed there (text and color, sprite and position...).
+`collect_dirty` compares the frame against the previous one and returns only
+the rects whose content changed, ready for `pygame.display.update(rects)`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import pygame
+
+from csp.graphics import SCREEN_SIZE
+
+# Past this many separate rects a single bounding rect is cheaper to push
+MAX_DIRTY_RECTS: int = 48
+
+
+@dataclass
+class DirtyTracker:
+    prev: dict[object, tuple[pygame.Rect, object]] = field(default_factory=dict)
+    cur: dict[object, tuple[pygame.Rect, object]] = field(default_factory=dict)
+    # Push the whole screen on the next collect (first frame, mode switch, expose)
+    full: bool = True
+
+
+def track(tracker: DirtyTracker, key: object, rect: pygame.Rect, sig: object) -> None:
+    """Record that `rect` was painted this frame showing content `sig`."""
+    tracker.cur[key] = (pygame.Rect(rect), sig)
+
+
+def invalidate(tracker: DirtyTracker) -> None:
+    tracker.full = True
+
+
+def collect_dirty(tracker: DirtyTracker) -> list[pygame.Rect]:
+    """Finish the frame: return rects that changed since the last one and roll over."""
+    prev, cur = tracker.prev, tracker.cur
+    tracker.prev = cur
+    tracker.cur = {}
+    if tracker.full:
+        tracker.full = False
+        return [pygame.Rect((0, 0), SCREEN_SIZE)]
+    rects: list[pygame.Rect] = []
+    for key, (rect, sig) in cur.items():
+        old = prev.get(key)
+        if old is None:
+            rects.append(rect)
+        elif old[1] != sig or old[0] != rect:
+            rects.append(old[0])
+            rects.append(rect)
+    for key, (rect, _sig) in prev.items():
+        if key not in cur:
+            rects.append(rect)
+    if len(rects) > MAX_DIRTY_RECTS:
+        return [rects[0].unionall(rects[1:])]
+    return rects
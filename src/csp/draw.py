@@ -6,38 +6,87 @@ from csp.graphics import (
     CELL_SIZE,
     COLORS,
     COLS,
+    FPS,
     GAME_OFFSET_X,
     LEFT_PANEL_WIDTH,
     PANEL_WIDTH,
     ROWS,
     SCREEN_SIZE,
 )
+from csp.dirty import track
+from csp.fov import player_fov
+from csp.profiler import PHASES, phase, phase_averages
+from csp.layout import sync_log_layout, wrap_text
+from csp.lighting import update_lighting
 from csp.state import State, all_entities, GameMode
 from csp.sprites import load_sprite_for_entity, load_sprite_for_name
+from csp.text import render_text
+from csp.tilegrid import TILE_KINDS
 from csp.ai import append_debug_shapes
 
 
-def draw_grid(state: State, screen: pygame.Surface, cam_x: int, cam_y: int) -> None:
-    # Draw grid only over the visible portion of the current map
-    view_w, view_h = COLS, ROWS
-    map_w, map_h = state.map_cols, state.map_rows
-    x_min_map = max(cam_x, 0)
-    x_max_map = min(cam_x + view_w, map_w)
-    y_min_map = max(cam_y, 0)
-    y_max_map = min(cam_y + view_h, map_h)
-
-    # Vertical lines
-    for ix in range(x_min_map, x_max_map + 1):
-        x = GAME_OFFSET_X + (ix - cam_x) * CELL_SIZE
-        y1 = (y_min_map - cam_y) * CELL_SIZE
-        y2 = (y_max_map - cam_y) * CELL_SIZE
-        pygame.draw.line(screen, COLORS["grid"], (x, y1), (x, y2))
-    # Horizontal lines
-    for iy in range(y_min_map, y_max_map + 1):
-        y = (iy - cam_y) * CELL_SIZE
-        x1 = GAME_OFFSET_X + (x_min_map - cam_x) * CELL_SIZE
-        x2 = GAME_OFFSET_X + (x_max_map - cam_x) * CELL_SIZE
-        pygame.draw.line(screen, COLORS["grid"], (x1, y), (x2, y))
+def _bake_cell(layer: pygame.Surface, state: State, tx: int, ty: int) -> None:
+    """Render one map cell (floor, tile, grid lines) into the static layer."""
+    x = tx * CELL_SIZE
+    y = ty * CELL_SIZE
+    layer.fill(COLORS["background"], (x, y, CELL_SIZE, CELL_SIZE))
+    k = state.tile_kinds[ty * state.map_cols + tx]
+    if k:
+        tile = TILE_KINDS[k]
+        if tile.sprite is not None:
+            spr = load_sprite_for_name(tile.sprite)
+            if spr is not None:
+                layer.blit(spr, (x, y))
+        elif tile.collidable:
+            pygame.draw.rect(layer, COLORS["wall"], (x, y, CELL_SIZE, CELL_SIZE))
+    pygame.draw.line(layer, COLORS["grid"], (x, y), (x, y + CELL_SIZE))
+    pygame.draw.line(layer, COLORS["grid"], (x, y), (x + CELL_SIZE, y))
+
+
+def _bake_static_layer(state: State) -> pygame.Surface:
+    """Return the current map's static layer, re-rendering only what changed.
+
+    A whole-grid change (map load, wall reskin) rebuilds the surface; single
+    tile edits (leaves consumed, gate opened, torch taken) re-bake their cells.
+    """
+    layer = state.static_layer
+    if layer is None or state.static_layer_epoch != state.grid_epoch:
+        map_w, map_h = state.map_cols, state.map_rows
+        layer = pygame.Surface((map_w * CELL_SIZE + 1, map_h * CELL_SIZE + 1))
+        if pygame.display.get_surface() is not None:
+            layer = layer.convert()
+        for ty in range(map_h):
+            for tx in range(map_w):
+                _bake_cell(layer, state, tx, ty)
+        # Closing lines along the right and bottom map edges
+        pygame.draw.line(
+            layer, COLORS["grid"], (map_w * CELL_SIZE, 0), (map_w * CELL_SIZE, map_h * CELL_SIZE)
+        )
+        pygame.draw.line(
+            layer, COLORS["grid"], (0, map_h * CELL_SIZE), (map_w * CELL_SIZE, map_h * CELL_SIZE)
+        )
+        state.static_layer = layer
+        state.static_layer_epoch = state.grid_epoch
+        state.tiles_dirty.clear()
+    elif state.tiles_dirty:
+        for tx, ty in state.tiles_dirty:
+            _bake_cell(layer, state, tx, ty)
+        state.tiles_dirty.clear()
+    return layer
+
+
+def _blit_text(
+    state: State,
+    screen: pygame.Surface,
+    font: pygame.font.Font,
+    text: str,
+    color: tuple[int, int, int],
+    pos: tuple[int, int],
+) -> pygame.Rect:
+    """Render and blit one line of text, recording it for dirty-rect updates."""
+    rect = screen.blit(render_text(font, text, color), pos)
+    track(state.dirty, ("text", pos), rect, (text, color))
+    return rect
 
 
 def draw_ui(state: State, screen: pygame.Surface, font: pygame.font.Font) -> None:
@@ -57,21 +106,21 @@ def draw_ui(state: State, screen: pygame.Surface, font: pygame.font.Font) -> Non
     ]
     # Draw stats
     for i, text in enumerate(stats):
-        screen.blit(font.render(text, True, COLORS["text"]), (panel_x, 10 + i * 20))
+        _blit_text(state, screen, font, text, COLORS["text"], (panel_x, 10 + i * 20))
 
     # Draw binds on left panel
     left_x = 10
     left_y = 10
-    screen.blit(font.render("Binds:", True, COLORS["text"]), (left_x, left_y))
+    _blit_text(state, screen, font, "Binds:", COLORS["text"], (left_x, left_y))
     binds_list = ["1", "2", "3", "4", "5", "6", "7", "8", "9", "0"]
     for i, k in enumerate(binds_list):
         label = state.binds.get(k, "-")
         txt = f" {k}: {label}"
-        screen.blit(font.render(txt, True, COLORS["text"]), (left_x, left_y + 20 + i * 18))
+        _blit_text(state, screen, font, txt, COLORS["text"], (left_x, left_y + 20 + i * 18))
 
     # Inventory under binds (show icons and bound slot numbers)
     inv_y = left_y + 20 + len(binds_list) * 18 + 16
-    screen.blit(font.render("Inventory:", True, COLORS["text"]), (left_x, inv_y))
+    _blit_text(state, screen, font, "Inventory:", COLORS["text"], (left_x, inv_y))
     inv_y += 18
     # Inventory entries: owned items; annotate Torch with lit/remaining from item state
     entries: list[tuple[str, int]] = [(k, int(v)) for k, v in state.owned_items.items() if int(v) > 0]
@@ -109,29 +158,24 @@ def draw_ui(state: State, screen: pygame.Surface, font: pygame.font.Font) -> Non
             except Exception:
                 icon = None
             if icon is not None:
-                screen.blit(icon, (left_x, inv_y - 1))
+                icon_rect = screen.blit(icon, (left_x, inv_y - 1))
+                track(state.dirty, ("icon", inv_y), icon_rect, name)
                 text_x = left_x + icon.get_width() + 6
             else:
                 text_x = left_x
-            screen.blit(font.render(label, True, COLORS["text"]), (text_x, inv_y))
+            _blit_text(state, screen, font, label, COLORS["text"], (text_x, inv_y))
             inv_y += max(16, (icon.get_height() if icon is not None else 0)) or 16
     else:
-        screen.blit(font.render(" (empty)", True, COLORS["text"]), (left_x, inv_y))
+        _blit_text(state, screen, font, " (empty)", COLORS["text"], (left_x, inv_y))
 
-    # Draw message log below stats on the right, with simple wrapping
+    # Draw message log below stats on the right; lines are wrapped once as they arrive
     offset = 300
     max_w = PANEL_WIDTH - 20
-    y = offset
     max_y = ROWS * CELL_SIZE - 10
-    # Flatten wrapped lines and show the most recent lines at the bottom
-    all_lines: list[tuple[str, int]] = []
-    for msg, when in state.message_log:
-        wrapped = _wrap_text(font, msg, max_w)
-        for w in wrapped:
-            all_lines.append((w, when))
     line_h = 20
     max_lines = (max_y - offset) // line_h
-    recent = all_lines[-max_lines:]
+    # Most recent lines sit at the bottom
+    recent = sync_log_layout(state.log_layout, state, font, max_w, max_lines)
     start_y = max(offset, max_y - len(recent) * line_h)
     y = start_y
     for text, when in recent:
@@ -140,199 +184,279 @@ def draw_ui(state: State, screen: pygame.Surface, font: pygame.font.Font) -> Non
             color = (255, 255, 255)
         else:
             color = (200, 200, 200)
-        screen.blit(font.render(text, True, color), (panel_x, y))
+        _blit_text(state, screen, font, text, color, (panel_x, y))
         y += line_h
 
 
 
 def draw_frame(state: State, screen: pygame.Surface, font: pygame.font.Font) -> None:
     """Draws the gameplay scene (when in PLAYING mode)."""
-    screen.fill(COLORS["background"])
-
-    # Clear per-frame debug shapes, then allow systems to append
-    state.debug_shapes = []
-
-    # Camera in tile coords. Center on player, clamp to map; center small maps.
-    view_w, view_h = COLS, ROWS
-    map_w, map_h = state.map_cols, state.map_rows
-    # Default center camera on player
-    cam_x = state.player.x - view_w // 2
-    cam_y = state.player.y - view_h // 2
-    # Clamp to map bounds
-    cam_x = max(0, min(cam_x, max(0, map_w - view_w)))
-    cam_y = max(0, min(cam_y, max(0, map_h - view_h)))
-    # If map smaller than view, center it by allowing negative cam offsets
-    if map_w < view_w:
-        cam_x = -(view_w - map_w) // 2
-    if map_h < view_h:
-        cam_y = -(view_h - map_h) // 2
-
-    # Draw plain collidable tiles (no sprite) as wall rects
-    for (tx, ty), tile in state.map_tiles.items():
-        if not tile.collidable or tile.sprite is not None:
-            continue
-        if not (cam_x <= tx < cam_x + view_w and cam_y <= ty < cam_y + view_h):
-            continue
-        pygame.draw.rect(
-            screen,
-            COLORS["wall"],
+    with phase(state, "draw_static"):
+        screen.fill(COLORS["background"])
+
+        # Clear per-frame debug shapes, then allow systems to append
+        state.debug_shapes = []
+
+        # Camera in tile coords. Center on player, clamp to map; center small maps.
+        view_w, view_h = COLS, ROWS
+        map_w, map_h = state.map_cols, state.map_rows
+        # Default center camera on player
+        cam_x = state.player.x - view_w // 2
+        cam_y = state.player.y - view_h // 2
+        # Clamp to map bounds
+        cam_x = max(0, min(cam_x, max(0, map_w - view_w)))
+        cam_y = max(0, min(cam_y, max(0, map_h - view_h)))
+        # If map smaller than view, center it by allowing negative cam offsets
+        if map_w < view_w:
+            cam_x = -(view_w - map_w) // 2
+        if map_h < view_h:
+            cam_y = -(view_h - map_h) // 2
+
+        # Walls, tile sprites and grid lines come pre-rendered; blit the visible window
+        layer = _bake_static_layer(state)
+        with phase(state, "lighting"):
+            overlay = update_lighting(state)
+        play_rect = pygame.Rect(GAME_OFFSET_X, 0, COLS * CELL_SIZE, ROWS * CELL_SIZE)
+        track(
+            state.dirty,
+            ("play",),
+            play_rect,
             (
-                GAME_OFFSET_X + (tx - cam_x) * CELL_SIZE,
-                (ty - cam_y) * CELL_SIZE,
-                CELL_SIZE,
-                CELL_SIZE,
+                state.current_map_id,
+                state.grid_epoch,
+                state.tiles_version,
+                state.light.version,
+                cam_x,
+                cam_y,
             ),
         )
+        x0, x1 = max(cam_x, 0), min(cam_x + view_w, map_w)
+        y0, y1 = max(cam_y, 0), min(cam_y + view_h, map_h)
+        if x1 > x0 and y1 > y0:
+            screen.blit(
+                layer,
+                (GAME_OFFSET_X + (x0 - cam_x) * CELL_SIZE, (y0 - cam_y) * CELL_SIZE),
+                (
+                    x0 * CELL_SIZE,
+                    y0 * CELL_SIZE,
+                    (x1 - x0) * CELL_SIZE + 1,
+                    (y1 - y0) * CELL_SIZE + 1,
+                ),
+            )
 
-    # Draw tile images (non-grid visuals like torches/leaves)
-    for (tx, ty), tile in list(state.map_tiles.items()):
-        if tile.sprite is None:
-            continue
-        if not (cam_x <= tx < cam_x + view_w and cam_y <= ty < cam_y + view_h):
-            continue
-        spr = load_sprite_for_name(tile.sprite)
-        if spr is not None:
-            sx = GAME_OFFSET_X + (tx - cam_x) * CELL_SIZE
-            sy = (ty - cam_y) * CELL_SIZE
-            screen.blit(spr, (sx, sy))
-
-    # Draw entities (non-player first)
-    for e in all_entities(state):
-        if e is state.player:
-            continue
-        if not (cam_x <= e.x < cam_x + view_w and cam_y <= e.y < cam_y + view_h):
-            continue
-        sx = GAME_OFFSET_X + (e.x - cam_x) * CELL_SIZE
-        sy = (e.y - cam_y) * CELL_SIZE
-        spr = load_sprite_for_entity(e)
-        if spr is not None:
-            screen.blit(spr, (sx, sy))
+    with phase(state, "draw_entities"):
+        # Draw entities (non-player first); skip those out of the player's line of sight
+        visible = player_fov(state, (cam_x, cam_y, view_w, view_h))
+        for e in all_entities(state):
+            if e is state.player:
+                continue
+            if not (cam_x <= e.x < cam_x + view_w and cam_y <= e.y < cam_y + view_h):
+                continue
+            if (e.x, e.y) not in visible:
+                continue
+            sx = GAME_OFFSET_X + (e.x - cam_x) * CELL_SIZE
+            sy = (e.y - cam_y) * CELL_SIZE
+            rect = pygame.Rect(sx, sy, CELL_SIZE, CELL_SIZE)
+            spr = load_sprite_for_entity(e)
+            if spr is not None:
+                screen.blit(spr, (sx, sy))
+            else:
+                pygame.draw.circle(
+                    screen,
+                    e.color,
+                    (sx + CELL_SIZE // 2, sy + CELL_SIZE // 2),
+                    CELL_SIZE // 2,
+                )
+            if state.show_labels:
+                label = f"{e.name}"
+                lbl_surf = render_text(font, label, (255, 255, 255))
+                rect.union_ip(
+                    screen.blit(
+                        lbl_surf,
+                        (GAME_OFFSET_X + (e.x - cam_x) * CELL_SIZE, (e.y - cam_y) * CELL_SIZE - 10),
+                    )
+                )
+            track(state.dirty, ("ent", id(e)), rect, (e.name, e.char, e.color, state.show_labels))
+
+        # Draw player last
+        psx = GAME_OFFSET_X + (state.player.x - cam_x) * CELL_SIZE
+        psy = (state.player.y - cam_y) * CELL_SIZE
+        prect = pygame.Rect(psx, psy, CELL_SIZE, CELL_SIZE)
+        pspr = load_sprite_for_entity(state.player)
+        if pspr is not None:
+            screen.blit(pspr, (psx, psy))
         else:
             pygame.draw.circle(
                 screen,
-                e.color,
-                (sx + CELL_SIZE // 2, sy + CELL_SIZE // 2),
+                COLORS["player"],
+                (psx + CELL_SIZE // 2, psy + CELL_SIZE // 2),
                 CELL_SIZE // 2,
             )
         if state.show_labels:
-            label = f"{e.name}"
-            lbl_surf = font.render(label, True, (255, 255, 255))
-            screen.blit(
-                lbl_surf,
-                (GAME_OFFSET_X + (e.x - cam_x) * CELL_SIZE, (e.y - cam_y) * CELL_SIZE - 10),
+            label = f"{state.player.name}"
+            lbl_surf = render_text(font, label, (255, 255, 255))
+            prect.union_ip(
+                screen.blit(
+                    lbl_surf,
+                    (
+                        GAME_OFFSET_X + (state.player.x - cam_x) * CELL_SIZE,
+                        (state.player.y - cam_y) * CELL_SIZE - 10,
+                    ),
+                )
             )
+        track(state.dirty, ("player",), prect, (state.player.name, state.show_labels))
 
-    # Draw player last
-    psx = GAME_OFFSET_X + (state.player.x - cam_x) * CELL_SIZE
-    psy = (state.player.y - cam_y) * CELL_SIZE
-    pspr = load_sprite_for_entity(state.player)
-    if pspr is not None:
-        screen.blit(pspr, (psx, psy))
-    else:
-        pygame.draw.circle(
-            screen,
-            COLORS["player"],
-            (psx + CELL_SIZE // 2, psy + CELL_SIZE // 2),
-            CELL_SIZE // 2,
-        )
-    if state.show_labels:
-        label = f"{state.player.name}"
-        lbl_surf = font.render(label, True, (255, 255, 255))
-        screen.blit(
-            lbl_surf,
-            (
-                GAME_OFFSET_X + (state.player.x - cam_x) * CELL_SIZE,
-                (state.player.y - cam_y) * CELL_SIZE - 10,
-            ),
-        )
-
-    # Append and draw debug shapes (e.g., pig detection range)
-    append_debug_shapes(state)
-    if state.debug_shapes_on and state.debug_shapes:
-        for shp in state.debug_shapes:
-            try:
-                styp = shp.get("type")
-                color = tuple(shp.get("color", (255, 255, 0)))
-                if styp == "rect":
-                    (x1, y1), (x2, y2) = shp.get("aabb", ((0, 0), (0, 0)))
-                    px1 = GAME_OFFSET_X + (x1 - cam_x) * CELL_SIZE
-                    py1 = (y1 - cam_y) * CELL_SIZE
-                    px2 = GAME_OFFSET_X + (x2 - cam_x + 1) * CELL_SIZE
-                    py2 = (y2 - cam_y + 1) * CELL_SIZE
-                    pygame.draw.rect(screen, color, (px1, py1, px2 - px1, py2 - py1), width=1)
-                    lbl = shp.get("label")
-                    if lbl:
-                        screen.blit(font.render(str(lbl), True, color), (px1 + 2, py1 + 2))
-                elif styp == "circle":
-                    cx, cy = shp.get("pos", (0, 0))
-                    rad = int(shp.get("radius", 1)) * CELL_SIZE
-                    pcx = GAME_OFFSET_X + (cx - cam_x) * CELL_SIZE + CELL_SIZE // 2
-                    pcy = (cy - cam_y) * CELL_SIZE + CELL_SIZE // 2
-                    pygame.draw.circle(screen, color, (pcx, pcy), rad, width=1)
-                elif styp == "text":
-                    tx, ty = shp.get("pos", (0, 0))
-                    txt = str(shp.get("label", ""))
-                    px = GAME_OFFSET_X + (tx - cam_x) * CELL_SIZE
-                    py = (ty - cam_y) * CELL_SIZE
-                    screen.blit(font.render(txt, True, color), (px, py))
-            except Exception:
-                pass
+    # Darkness over the map and everything standing on it
+    if overlay is not None and x1 > x0 and y1 > y0:
+        with phase(state, "lighting"):
+            screen.blit(
+                overlay,
+                (GAME_OFFSET_X + (x0 - cam_x) * CELL_SIZE, (y0 - cam_y) * CELL_SIZE),
+                (x0 * CELL_SIZE, y0 * CELL_SIZE, (x1 - x0) * CELL_SIZE, (y1 - y0) * CELL_SIZE),
+            )
 
-    # Grid only over the visible map area
-    draw_grid(state, screen, cam_x, cam_y)
-    draw_ui(state, screen, font)
+    with phase(state, "draw_debug"):
+        # Append and draw debug shapes (e.g., pig detection range)
+        append_debug_shapes(state)
+        if state.debug_shapes_on and state.debug_shapes:
+            track(state.dirty, ("debug",), play_rect, repr(state.debug_shapes))
+            for shp in state.debug_shapes:
+                try:
+                    styp = shp.get("type")
+                    color = tuple(shp.get("color", (255, 255, 0)))
+                    if styp == "rect":
+                        (x1, y1), (x2, y2) = shp.get("aabb", ((0, 0), (0, 0)))
+                        px1 = GAME_OFFSET_X + (x1 - cam_x) * CELL_SIZE
+                        py1 = (y1 - cam_y) * CELL_SIZE
+                        px2 = GAME_OFFSET_X + (x2 - cam_x + 1) * CELL_SIZE
+                        py2 = (y2 - cam_y + 1) * CELL_SIZE
+                        pygame.draw.rect(screen, color, (px1, py1, px2 - px1, py2 - py1), width=1)
+                        lbl = shp.get("label")
+                        if lbl:
+                            screen.blit(render_text(font, str(lbl), color), (px1 + 2, py1 + 2))
+                    elif styp == "circle":
+                        cx, cy = shp.get("pos", (0, 0))
+                        rad = int(shp.get("radius", 1)) * CELL_SIZE
+                        pcx = GAME_OFFSET_X + (cx - cam_x) * CELL_SIZE + CELL_SIZE // 2
+                        pcy = (cy - cam_y) * CELL_SIZE + CELL_SIZE // 2
+                        pygame.draw.circle(screen, color, (pcx, pcy), rad, width=1)
+                    elif styp == "text":
+                        tx, ty = shp.get("pos", (0, 0))
+                        txt = str(shp.get("label", ""))
+                        px = GAME_OFFSET_X + (tx - cam_x) * CELL_SIZE
+                        py = (ty - cam_y) * CELL_SIZE
+                        screen.blit(render_text(font, txt, color), (px, py))
+                except Exception:
+                    pass
+
+    with phase(state, "draw_ui"):
+        draw_ui(state, screen, font)
     # Help overlay removed; Shop/Talk handled via Interact
 
     # Map name label at bottom of play area
     if state.current_map_id and state.current_map_id in state.maps:
         name = state.maps[state.current_map_id].name
-        label_surf = font.render(name, True, COLORS["text"])
+        label_surf = render_text(font, name, COLORS["text"])
         lx = GAME_OFFSET_X + (COLS * CELL_SIZE - label_surf.get_width()) // 2
         ly = ROWS * CELL_SIZE - label_surf.get_height() - 4
-        screen.blit(label_surf, (lx, ly))
+        track(state.dirty, ("map_name",), screen.blit(label_surf, (lx, ly)), name)
 
     # Death overlay
     if state.mode == GameMode.DEAD:
         overlay = pygame.Surface((COLS * CELL_SIZE, ROWS * CELL_SIZE), pygame.SRCALPHA)
         overlay.fill((80, 0, 0, 160))
         screen.blit(overlay, (GAME_OFFSET_X, 0))
-        _draw_centered_text(screen, font, "You Died", 120, (255, 80, 80))
-        _draw_centered_text(screen, font, "Press I for Inventory", 160, COLORS["text"])
+        track(state.dirty, ("dead",), play_rect, True)
+        _draw_centered_text(state, screen, font, "You Died", 120, (255, 80, 80))
+        _draw_centered_text(state, screen, font, "Press I for Inventory", 160, COLORS["text"])
+
+    if state.show_profiler:
+        draw_profiler_overlay(state, screen, font)
+
+
+# Stacking colors for the profiler graph, one per csp.profiler.PHASES entry
+PROFILER_COLORS: tuple[tuple[int, int, int], ...] = (
+    (90, 160, 255),  # input
+    (120, 220, 220),  # triggers
+    (255, 90, 90),  # enemy_ai
+    (255, 200, 60),  # economy
+    (200, 140, 255),  # flags
+    (255, 140, 200),  # items
+    (255, 255, 255),  # warp
+    (80, 200, 80),  # draw_static
+    (160, 230, 100),  # draw_entities
+    (230, 230, 120),  # draw_debug
+    (60, 140, 60),  # draw_ui
+    (170, 120, 255),  # lighting
+    (120, 120, 120),  # draw_other
+    (255, 130, 40),  # display
+)
+
+
+def draw_profiler_overlay(state: State, screen: pygame.Surface, font: pygame.font.Font) -> None:
+    """Rolling stacked graph of per-phase frame times, plus the heaviest phases."""
+    prof = state.profiler
+    graph_h = 90
+    px_per_ms = 3
+    width = prof.frames.maxlen or len(prof.frames)
+    line_h = 16
+    rect = pygame.Rect(GAME_OFFSET_X + 4, 4, width + 8, graph_h + 8 + line_h * 5)
+    panel = pygame.Surface(rect.size, pygame.SRCALPHA)
+    panel.fill((0, 0, 0, 190))
+    screen.blit(panel, rect.topleft)
+    gx = rect.x + 4
+    base_y = rect.y + 4 + graph_h
+    # Newest frame at the right edge
+    x = gx + width - len(prof.frames)
+    for row in prof.frames:
+        y = base_y
+        for ms, color in zip(row, PROFILER_COLORS, strict=True):
+            h = int(ms * px_per_ms + 0.5)
+            if h <= 0:
+                continue
+            h = min(h, y - (base_y - graph_h))
+            if h <= 0:
+                break
+            pygame.draw.line(screen, color, (x, y - 1), (x, y - h))
+            y -= h
+        x += 1
+    # Frame budget line
+    budget_y = base_y - int(1000 / FPS * px_per_ms)
+    pygame.draw.line(screen, (255, 60, 60), (gx, budget_y), (gx + width - 1, budget_y))
+
+    totals = [sum(row) for row in prof.frames]
+    last = totals[-1] if totals else 0.0
+    worst = max(totals, default=0.0)
+    avgs = phase_averages(prof)
+    ty = base_y + 4
+    header = f"frame ms  last {last:5.2f}  max {worst:5.2f}"
+    screen.blit(render_text(font, header, COLORS["text"]), (gx, ty))
+    # Heaviest phases on average over the buffer
+    top = sorted(range(len(PHASES)), key=lambda i: avgs[i], reverse=True)[:4]
+    for n, i in enumerate(top):
+        worst_i = max((row[i] for row in prof.frames), default=0.0)
+        label = f"{PHASES[i]:<13} avg {avgs[i]:5.2f} max {worst_i:5.2f}"
+        screen.blit(render_text(font, label, PROFILER_COLORS[i]), (gx, ty + (n + 1) * line_h))
+    track(state.dirty, ("profiler",), rect, prof.frames_recorded)
 
 
 def _draw_centered_text(
+    state: State,
     screen: pygame.Surface,
     font: pygame.font.Font,
     text: str,
     y: int,
     color: tuple[int, int, int] = (220, 220, 220),
 ) -> None:
-    surf = font.render(text, True, color)
+    surf = render_text(font, text, color)
     x = (SCREEN_SIZE[0] - surf.get_width()) // 2
-    screen.blit(surf, (x, y))
-
-
-def _wrap_text(font: pygame.font.Font, text: str, max_width: int) -> list[str]:
-    words = text.split()
-    if not words:
-        return [""]
-    lines: list[str] = []
-    cur = words[0]
-    for w in words[1:]:
-        test = cur + " " + w
-        if font.size(test)[0] <= max_width:
-            cur = test
-        else:
-            lines.append(cur)
-            cur = w
-    lines.append(cur)
-    return lines
+    track(state.dirty, ("ctext", y), screen.blit(surf, (x, y)), (text, color))
 
 
 def draw_main_menu(state: State, screen: pygame.Surface, font: pygame.font.Font) -> None:
     screen.fill(COLORS["background"])
     title_font = font
-    _draw_centered_text(screen, title_font, "Cant Save Princess", 120, COLORS["text"])
+    _draw_centered_text(state, screen, title_font, "Cant Save Princess", 120, COLORS["text"])
 
     options = ("Play", "Settings", "Quit")
     start_y = 200
@@ -340,27 +464,27 @@ def draw_main_menu(state: State, screen: pygame.Surface, font: pygame.font.Font)
         selected = i == state.menu_main_index
         color = (255, 215, 0) if selected else COLORS["text"]
         prefix = "> " if selected else "  "
-        _draw_centered_text(screen, font, prefix + label, start_y + i * 30, color)
+        _draw_centered_text(state, screen, font, prefix + label, start_y + i * 30, color)
 
 
 def draw_settings_menu(state: State, screen: pygame.Surface, font: pygame.font.Font) -> None:
     screen.fill(COLORS["background"])
-    _draw_centered_text(screen, font, "Settings", 120, COLORS["text"])
+    _draw_centered_text(state, screen, font, "Settings", 120, COLORS["text"])
     options = ("Back",)
     start_y = 200
     for i, label in enumerate(options):
         selected = i == state.menu_settings_index
         color = (255, 215, 0) if selected else COLORS["text"]
         prefix = "> " if selected else "  "
-        _draw_centered_text(screen, font, prefix + label, start_y + i * 30, color)
+        _draw_centered_text(state, screen, font, prefix + label, start_y + i * 30, color)
 
 
 def draw_shop_menu(state: State, screen: pygame.Surface, font: pygame.font.Font) -> None:
     screen.fill(COLORS["background"])
-    _draw_centered_text(screen, font, "Shop", 80, COLORS["text"])
+    _draw_centered_text(state, screen, font, "Shop", 80, COLORS["text"])
     items = state.shop_inventories.get(state.active_shop_id or "", [])
     if not items:
-        _draw_centered_text(screen, font, "No items", 130, COLORS["text"])
+        _draw_centered_text(state, screen, font, "No items", 130, COLORS["text"])
         return
     start_y = 140
     for i, it in enumerate(items):
@@ -374,8 +498,9 @@ def draw_shop_menu(state: State, screen: pygame.Surface, font: pygame.font.Font)
         owned = state.owned_items.get(name, 0)
         line = f"{name} - {cost}g  [{stock_txt}]  (own: {owned})"
         prefix = "> " if selected else "  "
-        _draw_centered_text(screen, font, prefix + line, start_y + i * 28, color)
+        _draw_centered_text(state, screen, font, prefix + line, start_y + i * 28, color)
     _draw_centered_text(
+        state,
         screen,
         font,
         "Enter: Buy  |  Esc: Quit",
@@ -386,10 +511,10 @@ def draw_shop_menu(state: State, screen: pygame.Surface, font: pygame.font.Font)
 
 def draw_inventory_menu(state: State, screen: pygame.Surface, font: pygame.font.Font) -> None:
     screen.fill(COLORS["background"])
-    _draw_centered_text(screen, font, "Inventory (press 1..0 to bind)", 80, COLORS["text"])
+    _draw_centered_text(state, screen, font, "Inventory (press 1..0 to bind)", 80, COLORS["text"])
     items = sorted([(k, v) for k, v in state.owned_items.items() if int(v) > 0])
     if not items:
-        _draw_centered_text(screen, font, "No items owned.", 130, COLORS["text"])
+        _draw_centered_text(state, screen, font, "No items owned.", 130, COLORS["text"])
         return
     # Reverse map for bound slot display
     rev_bind: dict[str, str] = {v: k for k, v in state.binds.items() if v}
@@ -401,8 +526,9 @@ def draw_inventory_menu(state: State, screen: pygame.Surface, font: pygame.font.
         slot_txt = f" [{slot}]" if slot else ""
         line = f"{name}{slot_txt} x{qty}"
         prefix = "> " if selected else "  "
-        _draw_centered_text(screen, font, prefix + line, start_y + i * 28, color)
+        _draw_centered_text(state, screen, font, prefix + line, start_y + i * 28, color)
     _draw_centered_text(
+        state,
         screen,
         font,
         "Press number to bind. Esc: Quit",
@@ -412,10 +538,18 @@ def draw_inventory_menu(state: State, screen: pygame.Surface, font: pygame.font.
 
 
 def draw_dialogue(state: State, screen: pygame.Surface, font: pygame.font.Font) -> None:
-    # Simple overlay with text and options
+    # Simple overlay with text and options. It is translucent, so repaint the
+    # scene under it on every redraw; otherwise each one darkens the last
+    draw_frame(state, screen, font)
     overlay = pygame.Surface((COLS * CELL_SIZE, ROWS * CELL_SIZE), pygame.SRCALPHA)
     overlay.fill((0, 0, 0, 180))
     screen.blit(overlay, (GAME_OFFSET_X, 0))
+    track(
+        state.dirty,
+        ("dialogue",),
+        pygame.Rect(GAME_OFFSET_X, 0, COLS * CELL_SIZE, ROWS * CELL_SIZE),
+        (state.dialogue_id, state.dialogue_node, state.menu_dialogue_index),
+    )
 
     if not state.dialogue_id or not state.dialogue_node:
         return
@@ -425,12 +559,12 @@ def draw_dialogue(state: State, screen: pygame.Surface, font: pygame.font.Font)
     text = str(node.get("text", ""))
     options = node.get("options", [])
 
-    # Wrap not implemented; render lines stacked
-    lines = [text]
+    # Node text wraps to the overlay; options follow one per line
+    lines = list(wrap_text(font, text, COLS * CELL_SIZE - 40))
     for i, opt in enumerate(options):
         prefix = "> " if i == state.menu_dialogue_index else "  "
         lines.append(prefix + str(opt.get("label", "")))
 
     start_y = 120
     for i, line in enumerate(lines):
-        _draw_centered_text(screen, font, line, start_y + i * 22, COLORS["text"])
+        _draw_centered_text(state, screen, font, line, start_y + i * 22, COLORS["text"])
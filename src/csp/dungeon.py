@@ -0,0 +1,433 @@
+"""Seeded cave-and-temple dungeon generator, vectorized when NumPy (the `fast` extra) is installed.
+
+`make_dungeon(seed, cols, rows)` returns a `MapDef` with packed walls
+(`MapDef.wall_bits`). The same seed and size always give the same map. With
+NumPy it runs in whole-array passes, so a 1000 x 1000 map takes a fraction of a
+second:
+
+1. noise: each cell is a wall with probability `FILL`;
+2. cellular automaton: `SMOOTH_STEPS` rounds of the 4-5 rule (a cell becomes
+   wall with 5+ walls among its 8 neighbours, floor with 3 or fewer; the map
+   edge counts as wall), which turns noise into caves;
+3. clearings: the spawn, the npc spots and the bunny meadow (bottom-right) are
+   forced open, and the temple square (bottom-left, `TEMPLE` on a side or
+   less on small maps, so it stays clear of the other clearings) is solid for
+   now;
+4. connectivity: floor cells are grouped into horizontal runs, and the runs are
+   merged into regions by union-find over vertical overlaps (hook-and-compress
+   on arrays). Regions smaller than `MIN_REGION` are filled in (unless they
+   hold an npc or the temple doorstep); every other
+   region gets an L-shaped tunnel to the nearest cell of the spawn's region,
+   bent so that it never enters the temple. All floor is then reachable;
+5. temple: a perfect maze (randomized depth-first search on the odd cells) is
+   carved into the temple square, entered from the middle of its top edge,
+   with the chest in the cell nearest its center.
+
+Without NumPy the same steps run cell by cell on a flat bytearray, with regions
+found by flood fill; that is fine at screen size but slow on huge maps, and a
+seed gives a different (equally valid) map than with NumPy.
+
+Maps too small to fit a temple of `MIN_TEMPLE` beside the other clearings
+raise `ValueError`. A map whose floor still ends up split raises `RuntimeError`.
+"""
+
+from __future__ import annotations
+
+import random
+from typing import TYPE_CHECKING
+
+from csp.entities import Entity
+from csp.graphics import COLORS, COLS, ROWS
+from csp.maps import MapDef
+
+if TYPE_CHECKING:
+    import numpy as np
+else:
+    try:
+        import numpy as np
+    except ImportError:  # optional: pip install "CantSavePrincess[fast]"
+        np = None
+
+# Initial wall density
+FILL: float = 0.45
+SMOOTH_STEPS: int = 4
+# Smaller cave pockets are filled in instead of tunneled to
+MIN_REGION: int = 12
+# Side of the bunny meadow (bottom-right) and the temple maze (bottom-left)
+MEADOW: int = 10
+TEMPLE: int = 30
+# Smallest temple worth a maze (2 x 2 maze cells)
+MIN_TEMPLE: int = 5
+
+# (x0, y0, x1, y1), ends exclusive; ends past the map edge are clipped
+Rect = tuple[int, int, int, int]
+
+
+def make_dungeon(seed: int, cols: int = COLS, rows: int = ROWS) -> MapDef:
+    """Generate the cave dungeon for `seed` as a `cols` x `rows` map."""
+    temple = _temple_side(cols, rows)
+    # Temple rectangle: x < temple, y >= top
+    top = rows - temple
+    spawn = (cols // 2, rows // 2)
+    entrance_x = _odd_floor(temple // 2)
+    chest_pos = (_odd_floor(temple // 2), top + _odd_floor(temple // 2))
+    npcs = _dungeon_npcs(cols, rows, chest_pos)
+
+    clear: list[Rect] = [(max(0, cols - MEADOW), max(0, rows - MEADOW), cols, rows)]
+    clear += [_around(e.x, e.y) for e in npcs if e.behavior != "chest"]
+    clear.append(_around(*spawn))
+    # Cells whose regions must survive the pocket fill: npc spots and the temple doorstep
+    anchors = [(e.x, e.y) for e in npcs if e.behavior != "chest"]
+    if top > 0:
+        clear.append((entrance_x, top - 1, entrance_x + 1, top))
+        anchors.append((entrance_x, top - 1))
+
+    build = _build_walls if np is not None else _build_walls_py
+    wall_bits, connected = build(
+        seed, cols, rows, spawn, clear, anchors, temple, top, entrance_x, chest_pos
+    )
+    if not connected:
+        raise RuntimeError(f"disconnected floor in dungeon {seed} ({cols} x {rows})")
+
+    return MapDef(
+        id="dungeon",
+        name="Dungeon",
+        size=(cols, rows),
+        wall_bits=wall_bits,
+        npcs=npcs,
+    )
+
+
+def _build_walls(
+    seed: int,
+    cols: int,
+    rows: int,
+    spawn: tuple[int, int],
+    clear: list[Rect],
+    anchors: list[tuple[int, int]],
+    temple: int,
+    top: int,
+    entrance_x: int,
+    chest_pos: tuple[int, int],
+) -> tuple[bytearray, bool]:
+    """Packed walls and whether all floor is connected, in whole-array passes."""
+    rng = np.random.default_rng(seed)
+    walls = rng.random((rows, cols)) < FILL
+    for _ in range(SMOOTH_STEPS):
+        walls = _smooth(walls)
+    for x0, y0, x1, y1 in clear:
+        walls[y0:y1, x0:x1] = False
+    walls[top:, :temple] = True
+    _connect(walls, spawn, anchors, temple, top, rng)
+    rnd = random.Random(int(rng.integers(1 << 62)))
+    for x, y in _temple_maze(temple, top, entrance_x, rnd):
+        walls[y, x] = False
+    walls[chest_pos[1], chest_pos[0]] = False
+    packed = bytearray(np.packbits(walls.ravel(), bitorder="little").tobytes())
+    return packed, _connected(walls)
+
+
+def _build_walls_py(
+    seed: int,
+    cols: int,
+    rows: int,
+    spawn: tuple[int, int],
+    clear: list[Rect],
+    anchors: list[tuple[int, int]],
+    temple: int,
+    top: int,
+    entrance_x: int,
+    chest_pos: tuple[int, int],
+) -> tuple[bytearray, bool]:
+    """`_build_walls` without NumPy: one byte (0/1) per cell, row-major."""
+    rnd = random.Random(seed)
+    walls = bytearray(rnd.random() < FILL for _ in range(cols * rows))
+    for _ in range(SMOOTH_STEPS):
+        walls = _smooth_py(walls, cols, rows)
+    for rect in clear:
+        _fill_py(walls, cols, rows, rect, 0)
+    _fill_py(walls, cols, rows, (0, top, temple, rows), 1)
+    _connect_py(walls, cols, rows, spawn, anchors, temple, top)
+    for x, y in _temple_maze(temple, top, entrance_x, rnd):
+        walls[y * cols + x] = 0
+    walls[chest_pos[1] * cols + chest_pos[0]] = 0
+    # Bit i of the little-endian integer is cell i (see MapDef.wall_bits)
+    bits = walls.translate(_DIGITS).decode()
+    packed = int(bits[::-1], 2).to_bytes((cols * rows + 7) // 8, "little")
+    return bytearray(packed), len(_regions_py(walls, cols)[1]) <= 1
+
+
+def _dungeon_npcs(cols: int, rows: int, chest_pos: tuple[int, int]) -> list[Entity]:
+    return [
+        Entity(
+            5,
+            5,
+            "T",
+            COLORS["trapper"],
+            "Old Trapper",
+            "Trades meat for gold",
+            behavior="trader",
+        ),
+        Entity(
+            cols - 5,
+            rows - 5,
+            "H",
+            COLORS["bunny_hut"],
+            "Bunny Hut",
+            "Spawns delicious friends",
+            behavior="hut",
+        ),
+        Entity(
+            cols // 2,
+            3,
+            "I",
+            COLORS["shop"],
+            "Item Shop",
+            "Sells powerful gear",
+            behavior="shop",
+        ),
+        Entity(
+            chest_pos[0],
+            chest_pos[1],
+            "C",
+            COLORS["chest"],
+            "Treasure Chest",
+            "Might contain a legendary sum!",
+            behavior="chest",
+        ),
+    ]
+
+
+def _temple_side(cols: int, rows: int) -> int:
+    # Keep left of the spawn and shop clearings (x from cols // 2 - 1), left of the
+    # meadow, and below the trapper (row 5)
+    side = min(TEMPLE, cols // 2 - 1, cols - MEADOW - 1, rows - 6)
+    if side < MIN_TEMPLE:
+        raise ValueError(f"a {cols} x {rows} map is too small for the dungeon")
+    return side
+
+
+def _odd_floor(n: int) -> int:
+    return max(1, n - 1 if n % 2 == 0 else n)
+
+
+def _around(x: int, y: int) -> Rect:
+    # The 3 x 3 block centered on (x, y)
+    return max(0, x - 1), max(0, y - 1), x + 2, y + 2
+
+
+def _smooth(walls: np.ndarray) -> np.ndarray:
+    rows, cols = walls.shape
+    padded = np.ones((rows + 2, cols + 2), dtype=np.uint8)
+    padded[1:-1, 1:-1] = walls
+    n = np.zeros((rows, cols), dtype=np.uint8)
+    for dy in range(3):
+        for dx in range(3):
+            if dx != 1 or dy != 1:
+                n += padded[dy : dy + rows, dx : dx + cols]
+    out: np.ndarray = (n >= 5) | (walls & (n == 4))
+    return out
+
+
+def _connect(
+    walls: np.ndarray,
+    spawn: tuple[int, int],
+    anchors: list[tuple[int, int]],
+    temple: int,
+    top: int,
+    rng: np.random.Generator,
+) -> None:
+    """Fill tiny pockets and tunnel every other region to the spawn's region."""
+    run_rows, run_x0, run_x1, run_id, parent = _floor_regions(walls)
+    n = len(run_rows)
+    if n == 0:
+        return
+    size = np.bincount(parent, weights=run_x1 - run_x0, minlength=n)
+    main = parent[run_id[spawn[1], spawn[0]]]
+    kept = [parent[run_id[y, x]] for x, y in anchors if not walls[y, x]]
+    small = (size[parent] < MIN_REGION) & ~np.isin(parent, [main, *kept])
+    for r, x0, x1 in zip(run_rows[small], run_x0[small], run_x1[small], strict=True):
+        walls[r, x0:x1] = True
+
+    in_main = parent == main
+    main_y = run_rows[in_main]
+    main_x = (run_x0[in_main] + run_x1[in_main] - 1) // 2
+    # Roots are the lowest run id of their region, so each is also a run in it
+    for i in np.unique(parent[~small & ~in_main]).tolist():
+        y = int(run_rows[i])
+        x = int(rng.integers(run_x0[i], run_x1[i]))
+        j = int(np.argmin((main_x - x) ** 2 + (main_y - y) ** 2))
+        for x0, y0, x1, y1 in _tunnel(x, y, int(main_x[j]), int(main_y[j]), temple, top):
+            walls[y0:y1, x0:x1] = False
+
+
+def _floor_regions(
+    walls: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Floor runs (row, x0, x1 exclusive), each cell's run id, and each run's region root."""
+    rows, cols = walls.shape
+    floor = ~walls
+    # Horizontal runs of floor, row-major; the padding ends every run at its row
+    edges = np.diff(np.pad(floor, ((0, 0), (1, 1))).astype(np.int8), axis=1)
+    run_rows, run_x0 = np.nonzero(edges == 1)
+    run_x1 = np.nonzero(edges == -1)[1]
+    # Run id of every floor cell (starts counted in row-major order)
+    starts = np.zeros((rows, cols), dtype=np.int32)
+    starts[run_rows, run_x0] = 1
+    run_id = np.cumsum(starts.ravel()).reshape(rows, cols) - 1
+    # Two runs in adjacent rows overlap in one contiguous stretch; take its first cell
+    both = floor[:-1] & floor[1:]
+    first = both.copy()
+    first[:, 1:] &= ~both[:, :-1]
+    u = run_id[:-1][first]
+    v = run_id[1:][first]
+
+    parent = np.arange(len(run_rows))
+    while True:
+        ru, rv = parent[u], parent[v]
+        hooked = ru != rv
+        if not hooked.any():
+            break
+        np.minimum.at(parent, np.maximum(ru, rv)[hooked], np.minimum(ru, rv)[hooked])
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+    return run_rows, run_x0, run_x1, run_id, parent
+
+
+def _connected(walls: np.ndarray) -> bool:
+    """True if all floor is one region (4-connected)."""
+    parent = _floor_regions(walls)[4]
+    return len(parent) == 0 or bool((parent == parent[0]).all())
+
+
+def _tunnel(x1: int, y1: int, x2: int, y2: int, temple: int, top: int) -> tuple[Rect, Rect]:
+    """The two legs of an L-shaped tunnel from (x1, y1) to (x2, y2)."""
+    # Bend at whichever corner lies outside the temple; both legs then stay outside too
+    if x2 < temple and y1 >= top:
+        return (
+            (x1, min(y1, y2), x1 + 1, max(y1, y2) + 1),
+            (min(x1, x2), y2, max(x1, x2) + 1, y2 + 1),
+        )
+    return (
+        (min(x1, x2), y1, max(x1, x2) + 1, y1 + 1),
+        (x2, min(y1, y2), x2 + 1, max(y1, y2) + 1),
+    )
+
+
+def _temple_maze(
+    temple: int, top: int, entrance_x: int, rnd: random.Random
+) -> list[tuple[int, int]]:
+    """Cells to open in the (already solid) temple square for its maze and entrance."""
+    # Maze cells sit on odd offsets inside the square
+    cells = (temple - 1) // 2
+    if cells <= 0:
+        return []
+    seen = [[False] * cells for _ in range(cells)]
+    start = (entrance_x // 2 if entrance_x // 2 < cells else cells - 1, 0)
+    seen[start[1]][start[0]] = True
+    opened = [(2 * start[0] + 1, top + 1)]
+    stack = [start]
+    while stack:
+        cx, cy = stack[-1]
+        options = [
+            (nx, ny)
+            for nx, ny in ((cx + 1, cy), (cx - 1, cy), (cx, cy + 1), (cx, cy - 1))
+            if 0 <= nx < cells and 0 <= ny < cells and not seen[ny][nx]
+        ]
+        if not options:
+            stack.pop()
+            continue
+        nx, ny = rnd.choice(options)
+        seen[ny][nx] = True
+        opened.append((2 * nx + 1, top + 2 * ny + 1))
+        opened.append((cx + nx + 1, top + cy + ny + 1))
+        stack.append((nx, ny))
+    # Entrance: through the top wall into the first cell
+    opened.append((2 * start[0] + 1, top))
+    return opened
+
+
+# Pure-Python fallbacks (no NumPy), on one byte (0/1) per cell, row-major
+
+_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+
+
+def _fill_py(walls: bytearray, cols: int, rows: int, rect: Rect, value: int) -> None:
+    x0, y0, x1, y1 = rect
+    x1, y1 = min(x1, cols), min(y1, rows)
+    if x0 >= x1:
+        return
+    run = bytes([value]) * (x1 - x0)
+    for y in range(y0, y1):
+        walls[y * cols + x0 : y * cols + x1] = run
+
+
+def _smooth_py(walls: bytearray, cols: int, rows: int) -> bytearray:
+    out = bytearray(len(walls))
+    for y in range(rows):
+        for x in range(cols):
+            n = 0
+            for ny in (y - 1, y, y + 1):
+                for nx in (x - 1, x, x + 1):
+                    if not (0 <= nx < cols and 0 <= ny < rows):
+                        n += 1
+                    elif nx != x or ny != y:
+                        n += walls[ny * cols + nx]
+            i = y * cols + x
+            out[i] = n >= 5 or (walls[i] == 1 and n == 4)
+    return out
+
+
+def _regions_py(walls: bytearray, cols: int) -> tuple[list[int], list[int]]:
+    """Each cell's floor region (-1 on walls) and each region's size, by flood fill."""
+    label = [-1] * len(walls)
+    sizes: list[int] = []
+    for start, wall in enumerate(walls):
+        if wall or label[start] >= 0:
+            continue
+        region = len(sizes)
+        label[start] = region
+        stack = [start]
+        size = 0
+        while stack:
+            i = stack.pop()
+            size += 1
+            x = i % cols
+            for j in (i - 1 if x > 0 else -1, i + 1 if x < cols - 1 else -1, i - cols, i + cols):
+                if 0 <= j < len(walls) and not walls[j] and label[j] < 0:
+                    label[j] = region
+                    stack.append(j)
+        sizes.append(size)
+    return label, sizes
+
+
+def _connect_py(
+    walls: bytearray,
+    cols: int,
+    rows: int,
+    spawn: tuple[int, int],
+    anchors: list[tuple[int, int]],
+    temple: int,
+    top: int,
+) -> None:
+    """`_connect` by flood fill; each region tunnels from its first cell."""
+    label, sizes = _regions_py(walls, cols)
+    main = label[spawn[1] * cols + spawn[0]]
+    kept = {main, *(label[y * cols + x] for x, y in anchors if not walls[y * cols + x])}
+    main_cells = [(i % cols, i // cols) for i, r in enumerate(label) if r == main]
+    firsts: dict[int, int] = {}
+    for i, r in enumerate(label):
+        if r < 0 or r == main:
+            continue
+        if sizes[r] < MIN_REGION and r not in kept:
+            walls[i] = 1
+        else:
+            firsts.setdefault(r, i)
+    for i in firsts.values():
+        x, y = i % cols, i // cols
+        tx, ty = min(main_cells, key=lambda c: (c[0] - x) ** 2 + (c[1] - y) ** 2)
+        for rect in _tunnel(x, y, tx, ty, temple, top):
+            _fill_py(walls, cols, rows, rect, 0)
@@ -5,21 +5,25 @@ import random
 from csp.entities import Entity
 from csp.graphics import COLORS
 from csp.movement import can_move_to
+from csp.npc_index import add_npc, find_npc
 from csp.state import State
 
+# Chance per turn to spawn a bunny near the hut, up to a global cap
+BUNNY_SPAWN_CHANCE: float = 0.05
+BUNNY_CAP: int = 20
+
 
 def update_economy(state: State) -> None:
-    # 5% chance per turn to spawn bunny near the hut, up to a global cap
-    if getattr(state, "bunnies_spawned", 0) >= 20:
+    if getattr(state, "bunnies_spawned", 0) >= BUNNY_CAP:
         return
-    if random.random() < 0.05:
+    if random.random() < BUNNY_SPAWN_CHANCE:
         if spawn_bunny(state):
             state.bunnies_spawned = getattr(state, "bunnies_spawned", 0) + 1
 
 
 def spawn_bunny(state: State) -> bool:
     # Find a bunny hut/hole in current map
-    hut = next((e for e in state.npcs if e.behavior == "hut" or e.name == "Bunny Hut"), None)
+    hut = find_npc(state, behavior="hut", name="Bunny Hut")
     if hut is None:
         return False
     # Try a few random spots near the hut
@@ -39,6 +43,6 @@ def spawn_bunny(state: State) -> bool:
                 attackable=True,
             )
             bunny.health = 1
-            state.npcs.append(bunny)
+            add_npc(state, bunny)
             return True
     return False
@@ -15,6 +15,7 @@ class Entity:
         behavior: str | None = None,
         alignment: str = "neutral",
         attackable: bool = False,
+        speed: int = 100,
     ) -> None:
         self.x: int = x
         self.y: int = y
@@ -25,6 +26,8 @@ class Entity:
         self.behavior: str | None = behavior
         self.alignment: str = alignment
         self.attackable: bool = attackable
+        # Energy per player turn; 100 = one action a turn (see csp.scheduler)
+        self.speed: int = speed
         self.health: int = 3
         self.inventory: dict[str, object] = {}
         # For special items/entities
@@ -0,0 +1,148 @@
+"""Field of view over the collision grid (symmetric shadowcasting).
+
+`field_of_view` returns the set of tiles visible from an origin within a
+radius: floor tiles whose centers are in view, plus the walls that bound them.
+The algorithm is symmetric, so if A can see B then B can see A, which keeps
+"can the pig see me" and "can I shoot the pig" in agreement. Slopes are kept
+as integer fractions so results do not depend on float rounding.
+
+Results are cached per (origin, radius) for the current map and dropped as a
+whole when the map changes or a tile edit bumps `tiles_version`, so repeated
+queries within a turn (AI, attacks, the renderer) cost one dict lookup.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from csp.graphics import COLS, ROWS
+
+if TYPE_CHECKING:
+    from csp.state import State
+
+# Player sight for rendering: reaches the viewport corners from its center (the
+# half-diagonal), so walls, not range, decide what is seen
+PLAYER_SIGHT_RADIUS: int = math.ceil(math.hypot(COLS / 2, ROWS / 2))
+# Distinct (origin, radius) results kept per map version
+FOV_CACHE_SIZE: int = 256
+
+# (row axis, col axis) transforms for the four quadrants: north, east, south, west
+_QUADRANTS: tuple[tuple[int, int, int, int], ...] = (
+    (0, -1, 1, 0),
+    (1, 0, 0, 1),
+    (0, 1, 1, 0),
+    (-1, 0, 0, 1),
+)
+
+
+@dataclass
+class FovCache:
+    # (map id, tiles_version) the entries were computed for
+    key: tuple[object, ...] | None = None
+    entries: OrderedDict[tuple[int, int, int], frozenset[tuple[int, int]]] = field(
+        default_factory=OrderedDict
+    )
+
+
+def field_of_view(state: State, x: int, y: int, radius: int) -> frozenset[tuple[int, int]]:
+    """Tiles visible from (x, y) within `radius` (Euclidean) on the current map."""
+    cache = state.fov_cache
+    version = (state.current_map_id, state.tiles_version)
+    if cache.key != version:
+        cache.entries.clear()
+        cache.key = version
+    k = (x, y, radius)
+    hit = cache.entries.get(k)
+    if hit is not None:
+        cache.entries.move_to_end(k)
+        return hit
+    seen = frozenset(_shadowcast(state.collision, state.map_cols, state.map_rows, x, y, radius))
+    cache.entries[k] = seen
+    if len(cache.entries) > FOV_CACHE_SIZE:
+        cache.entries.popitem(last=False)
+    return seen
+
+
+def can_see(state: State, src: tuple[int, int], dst: tuple[int, int], radius: int) -> bool:
+    return dst in field_of_view(state, src[0], src[1], radius)
+
+
+def player_fov(
+    state: State, view: tuple[int, int, int, int] | None = None
+) -> frozenset[tuple[int, int]]:
+    """What the player sees; with `view` (x, y, width, height of the visible window)
+    the sight reaches its far corners even when the camera is clamped off-center."""
+    p = state.player
+    radius = PLAYER_SIGHT_RADIUS
+    if view is not None:
+        x0, y0, w, h = view
+        dx = max(p.x - x0, x0 + w - 1 - p.x)
+        dy = max(p.y - y0, y0 + h - 1 - p.y)
+        radius = max(radius, math.ceil(math.hypot(dx, dy)))
+    return field_of_view(state, p.x, p.y, radius)
+
+
+def _shadowcast(
+    collision: bytearray, cols: int, rows: int, ox: int, oy: int, radius: int
+) -> set[tuple[int, int]]:
+    seen: set[tuple[int, int]] = set()
+    if not (0 <= ox < cols and 0 <= oy < rows):
+        return seen
+    seen.add((ox, oy))
+    r2 = radius * radius + radius  # slightly rounder circles than r*r
+
+    for quadrant in _QUADRANTS:
+        # Rows to scan: (depth, start slope num/den, end slope num/den)
+        stack = [(1, -1, 1, 1, 1)]
+        while stack:
+            depth, sn, sd, en, ed = stack.pop()
+            if depth > radius:
+                continue
+            # Columns whose centers fall within [start, end] slopes (ties rounded inward)
+            min_col = (2 * depth * sn + sd) // (2 * sd)
+            max_col = -((-(2 * depth * en - ed)) // (2 * ed))
+            prev_wall: bool | None = None
+            for col in range(min_col, max_col + 1):
+                wall = _blocked(collision, cols, rows, ox, oy, quadrant, depth, col)
+                if col * col + depth * depth <= r2:
+                    symmetric = col * sd >= depth * sn and col * ed <= depth * en
+                    if wall or symmetric:
+                        tx, ty = _cell(ox, oy, quadrant, depth, col)
+                        if 0 <= tx < cols and 0 <= ty < rows:
+                            seen.add((tx, ty))
+                if prev_wall and not wall:
+                    # Leaving a wall run: the visible wedge restarts at this tile's edge
+                    sn, sd = 2 * col - 1, 2 * depth
+                if prev_wall is False and wall:
+                    # Entering a wall run: scan the open wedge up to here one row deeper
+                    stack.append((depth + 1, sn, sd, 2 * col - 1, 2 * depth))
+                prev_wall = wall
+            if prev_wall is False:
+                stack.append((depth + 1, sn, sd, en, ed))
+    return seen
+
+
+def _cell(
+    ox: int, oy: int, quadrant: tuple[int, int, int, int], depth: int, col: int
+) -> tuple[int, int]:
+    rx, ry, cx, cy = quadrant
+    return ox + rx * depth + cx * col, oy + ry * depth + cy * col
+
+
+def _blocked(
+    collision: bytearray,
+    cols: int,
+    rows: int,
+    ox: int,
+    oy: int,
+    quadrant: tuple[int, int, int, int],
+    depth: int,
+    col: int,
+) -> bool:
+    tx, ty = _cell(ox, oy, quadrant, depth, col)
+    if not (0 <= tx < cols and 0 <= ty < rows):
+        return True
+    return collision[ty * cols + tx] != 0
@@ -21,6 +21,7 @@ def damage_player(state, amount: int, source: str | None = None) -> None:
         log(state, f"You take {dmg} damage!")
     if state.player.health <= 0:
         log(state, "You have died...")
+        state.death_cause = source or "unknown"
         # Enter dead mode to block further actions
         state.mode = GameMode.DEAD
         # Stop any ongoing move repeats
@@ -18,6 +18,8 @@ SCREEN_SIZE: tuple[int, int] = (
 )
 FULLSCREEN: bool = False
 FPS: int = 60
+# When nothing changes on screen the loop blocks on input for up to this long
+IDLE_WAIT_MS: int = 250
 
 # Colors
 COLORS: dict[str, tuple[int, int, int]] = {
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 from csp.commerce import do_shop, trade_with_trapper
-from csp.common import Direction, is_adjacent
+from csp.common import Direction
 from csp.flags import has_flag, set_flag
-from csp.state import GameMode, State, all_entities
+from csp.npc_index import remove_npc
+from csp.state import GameMode, State
+from csp.tilegrid import set_tile
 
 
 def handle_interact(state: State, preferred: Direction | None = None) -> None:
@@ -37,10 +39,7 @@ def handle_interact(state: State, preferred: Direction | None = None) -> None:
 
             # Left torch in riddle room is at (3,2)
             if state.current_map_id == "riddle_room" and (tx, ty) == (3, 2):
-                try:
-                    del state.map_tiles[(tx, ty)]
-                except KeyError:
-                    pass
+                set_tile(state, (tx, ty), None)
                 # Add/augment Torch item with per-item state
                 state.owned_items["Torch"] = state.owned_items.get("Torch", 0) + 1
                 inv = state.player.inventory.get("Torch")
@@ -60,12 +59,12 @@ def handle_interact(state: State, preferred: Direction | None = None) -> None:
                 log(state, "The torch won't budge.")
             return
 
-    # Fall back to entity interactions
-    for e in all_entities(state):
-        if e is state.player:
-            continue
-        if is_adjacent(state.player, e):
-            candidates.append(e)
+    # Fall back to entity interactions (look up the 3x3 block around the player)
+    for ny in (py - 1, py, py + 1):
+        for nx in (px - 1, px, px + 1):
+            for e in state.occupancy.get((nx, ny), ()):
+                if e is not state.player:
+                    candidates.append(e)
 
     if not candidates:
         from csp.messages import log
@@ -138,10 +137,7 @@ def handle_interact(state: State, preferred: Direction | None = None) -> None:
         state.player.gold += 100
         set_flag(state, "riddle_room.gold_taken", scope="global", duration_steps=None)
         # Remove this gold from the current runtime map so it disappears immediately
-        try:
-            state.npcs = [x for x in state.npcs if x is not e]
-        except Exception:
-            pass
+        remove_npc(state, e)
         from csp.messages import log
 
         log(state, "You collected 100 gold!")
@@ -0,0 +1,72 @@
+"""Incremental text layout for the message log and dialogue.
+
+Messages are wrapped once, the first time the log panel sees them, and the
+wrapped lines are kept in a ring buffer sized to the panel. A frame with no
+new messages does no layout work at all. Wrapping is keyed on the font and
+width so dialogue text shares the same cache.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import islice
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pygame
+
+    from csp.state import State
+
+
+@lru_cache(maxsize=512)
+def wrap_text(font: pygame.font.Font, text: str, max_width: int) -> tuple[str, ...]:
+    """Greedy word wrap of `text` to `max_width` pixels in `font`."""
+    words = text.split()
+    if not words:
+        return ("",)
+    lines: list[str] = []
+    cur = words[0]
+    for w in words[1:]:
+        test = cur + " " + w
+        if font.size(test)[0] <= max_width:
+            cur = test
+        else:
+            lines.append(cur)
+            cur = w
+    lines.append(cur)
+    return tuple(lines)
+
+
+@dataclass
+class LogLayout:
+    # Most recent wrapped lines as (text, turn_when_logged)
+    lines: deque[tuple[str, int]] = field(default_factory=deque)
+    # state.messages_logged value already wrapped into `lines`
+    consumed: int = 0
+    # (font id, max_width, max_lines) the buffer was built for
+    key: tuple[int, int, int] | None = None
+
+
+def sync_log_layout(
+    layout: LogLayout,
+    state: State,
+    font: pygame.font.Font,
+    max_width: int,
+    max_lines: int,
+) -> deque[tuple[str, int]]:
+    """Wrap any messages logged since the last call and return the visible lines."""
+    key = (id(font), max_width, max_lines)
+    if layout.key != key or state.messages_logged < layout.consumed:
+        # New panel geometry (or a fresh State): re-wrap whatever is still in the log
+        layout.lines = deque(maxlen=max_lines)
+        layout.key = key
+        layout.consumed = state.messages_logged - len(state.message_log)
+    new = min(state.messages_logged - layout.consumed, len(state.message_log))
+    if new > 0:
+        for msg, when in islice(state.message_log, len(state.message_log) - new, None):
+            for line in wrap_text(font, msg, max_width):
+                layout.lines.append((line, when))
+    layout.consumed = state.messages_logged
+    return layout.lines
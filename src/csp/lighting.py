@@ -0,0 +1,164 @@
+"""Per-map light levels and the darkness overlay drawn over the play area.
+
+Each map has a base light (`MapDef.base_light`, 0 = pitch dark, 255 = full
+daylight). Light sources raise cells above it, falling off with distance and
+stopped by walls (a source lights the cells in its field of view):
+
+- placed tiles whose tag is in `LIGHT_TAGS` (riddle-room torches, lanterns)
+- a lit Torch in the player's inventory, carried at the player's position
+
+`update_lighting` keeps `state.light` in step with those sources. When the set
+of sources is unchanged it returns at once; when one moves or toggles, only
+the cells within reach of the old and new positions are recomputed, and only
+those cells of the cached overlay surface are repainted. A fully lit map has
+no overlay at all.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import pygame
+
+from csp.fov import field_of_view
+from csp.graphics import CELL_SIZE
+
+if TYPE_CHECKING:
+    from csp.state import State
+
+FULL_LIGHT: int = 255
+# Tile tag -> (radius, brightness)
+LIGHT_TAGS: dict[str, tuple[int, int]] = {
+    "torch": (5, 230),
+    "lantern": (4, 200),
+}
+# A lit Torch carried by the player
+PLAYER_TORCH_LIGHT: tuple[int, int] = (6, 255)
+
+# (x, y, radius, brightness)
+LightSource = tuple[int, int, int, int]
+
+
+@dataclass
+class LightMap:
+    # (map id, tiles_version) the levels were built for
+    key: tuple[object, ...] | None = None
+    base: int = FULL_LIGHT
+    # Light per cell, index y * map_cols + x
+    levels: bytearray = field(default_factory=bytearray)
+    sources: frozenset[LightSource] = frozenset()
+    tile_sources: tuple[LightSource, ...] = ()
+    # Lit cells per source as (flat index, level), reused while the grid is unchanged
+    pools: dict[LightSource, list[tuple[int, int]]] = field(default_factory=dict)
+    # Black with per-cell alpha = darkness, sized to the whole map
+    overlay: pygame.Surface | None = None
+    # Bumped whenever levels change (part of the play area's dirty signature)
+    version: int = 0
+
+
+def light_sources(state: State) -> frozenset[LightSource]:
+    """Every light source on the current map right now."""
+    light = state.light
+    found = list(light.tile_sources)
+    torch = state.player.inventory.get("Torch")
+    if isinstance(torch, dict) and torch.get("lit"):
+        radius, brightness = PLAYER_TORCH_LIGHT
+        found.append((state.player.x, state.player.y, radius, brightness))
+    return frozenset(found)
+
+
+def update_lighting(state: State) -> pygame.Surface | None:
+    """Bring the light map up to date and return the darkness overlay (None if fully lit)."""
+    light = state.light
+    key = (state.current_map_id, state.tiles_version)
+    if light.key != key:
+        _reset(state, key)
+        if light.base < FULL_LIGHT:
+            light.sources = light_sources(state)
+            _relight(state, light.sources, 0, 0, state.map_cols - 1, state.map_rows - 1)
+        return light.overlay
+    if light.base >= FULL_LIGHT:
+        # Daylight: sources can only brighten, so there is nothing to draw
+        return None
+    sources = light_sources(state)
+    if sources == light.sources:
+        return light.overlay
+    changed = light.sources ^ sources
+    light.sources = sources
+    x0 = max(0, min(x - r for x, _y, r, _b in changed))
+    y0 = max(0, min(y - r for _x, y, r, _b in changed))
+    x1 = min(state.map_cols - 1, max(x + r for x, _y, r, _b in changed))
+    y1 = min(state.map_rows - 1, max(y + r for _x, y, r, _b in changed))
+    _relight(state, sources, x0, y0, x1, y1)
+    return light.overlay
+
+
+def _reset(state: State, key: tuple[object, ...]) -> None:
+    light = state.light
+    m = state.maps.get(state.current_map_id or "")
+    light.key = key
+    light.base = getattr(m, "base_light", FULL_LIGHT)
+    light.levels = bytearray([light.base]) * (state.map_cols * state.map_rows)
+    light.pools = {}
+    light.tile_sources = tuple(
+        (x, y, *LIGHT_TAGS[t.tag]) for (x, y), t in state.map_tiles.items() if t.tag in LIGHT_TAGS
+    )
+    light.sources = frozenset()
+    light.overlay = None
+    light.version += 1
+
+
+def _pool(state: State, src: LightSource) -> list[tuple[int, int]]:
+    """Cells lit by one source and how brightly."""
+    pool = state.light.pools.get(src)
+    if pool is None:
+        sx, sy, radius, brightness = src
+        cols = state.map_cols
+        pool = []
+        for x, y in field_of_view(state, sx, sy, radius):
+            d = math.hypot(x - sx, y - sy)
+            level = int(brightness * (1.0 - d / (radius + 1)))
+            if level > 0:
+                pool.append((y * cols + x, level))
+        state.light.pools[src] = pool
+    return pool
+
+
+def _relight(
+    state: State, sources: frozenset[LightSource], x0: int, y0: int, x1: int, y1: int
+) -> None:
+    """Recompute levels inside the inclusive cell box and repaint those overlay cells."""
+    light = state.light
+    if x1 < x0 or y1 < y0:
+        return
+    cols = state.map_cols
+    levels = light.levels
+    base = light.base
+    for y in range(y0, y1 + 1):
+        row = y * cols
+        levels[row + x0 : row + x1 + 1] = bytes([base]) * (x1 - x0 + 1)
+    for src in sources:
+        sx, sy, r, _b = src
+        if sx + r < x0 or sx - r > x1 or sy + r < y0 or sy - r > y1:
+            continue
+        for i, level in _pool(state, src):
+            x, y = i % cols, i // cols
+            if x0 <= x <= x1 and y0 <= y <= y1 and level > levels[i]:
+                levels[i] = level
+    light.version += 1
+
+    if light.overlay is None:
+        light.overlay = pygame.Surface(
+            (cols * CELL_SIZE, state.map_rows * CELL_SIZE), pygame.SRCALPHA
+        )
+        x0, y0, x1, y1 = 0, 0, cols - 1, state.map_rows - 1
+    overlay = light.overlay
+    for y in range(y0, y1 + 1):
+        row = y * cols
+        for x in range(x0, x1 + 1):
+            overlay.fill(
+                (0, 0, 0, FULL_LIGHT - levels[row + x]),
+                (x * CELL_SIZE, y * CELL_SIZE, CELL_SIZE, CELL_SIZE),
+            )
@@ -5,7 +5,7 @@ Roguelike entrypoint for the refactored, de-OOPed architecture.
 import pygame
 
 from csp.graphics import Graphics
-from csp.map_runtime import load_map
+from csp.sim import new_game
 from csp.state import State
 from csp.step import step_loop
 
@@ -14,10 +14,7 @@ def main() -> None:
     pygame.init()
     gfx = Graphics.create()
     state = State()
-    # Load initial area; spawn slightly below center so we don't cover the sign
-    start = state.maps["start_area"].size
-    spawn = (start[0] // 2, min(start[1] - 2, start[1] // 2 + 2))
-    load_map(state, "start_area", spawn_pos=spawn)
+    new_game(state)
     step_loop(state, gfx.screen, gfx.font)
 
 
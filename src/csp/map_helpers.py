@@ -3,6 +3,7 @@ from __future__ import annotations
 from typing import Iterable
 
 from csp.flags import has_flag
+from csp.npc_index import npcs_with_behavior, remove_npc
 
 
 def hide_by_behavior_if_flag(state, behavior: str, flag: str) -> None:
@@ -12,7 +13,8 @@ def hide_by_behavior_if_flag(state, behavior: str, flag: str) -> None:
     """
     if not has_flag(state, flag):
         return
-    state.npcs = [e for e in state.npcs if getattr(e, "behavior", None) != behavior]
+    for e in list(npcs_with_behavior(state, behavior)):
+        remove_npc(state, e)
 
 
 def hide_by_name_if_flag(state, names: Iterable[str], flag: str) -> None:
@@ -22,5 +24,6 @@ def hide_by_name_if_flag(state, names: Iterable[str], flag: str) -> None:
     """
     if not has_flag(state, flag):
         return
-    names = set(names)
-    state.npcs = [e for e in state.npcs if e.name not in names]
+    for name in set(names):
+        for e in list(state.npcs_by_name.get(name, [])):
+            remove_npc(state, e)
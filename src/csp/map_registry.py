@@ -0,0 +1,99 @@
+"""Lazy map registry: map definitions are built on first use.
+
+`State.maps` is a `MapRegistry` (made by `load_maps`), a dict-like view of
+every authored map id. A `MapDef` is only made (decoded from its compiled map
+file, see csp.mapfiles, or by its builder in `maps.BUILDERS`) the first time its
+id is looked up, so startup and memory scale with the maps actually visited.
+Membership, `len` and iterating ids never build anything; `.values()` and
+`.items()` build every map, so keep those out of hot paths.
+
+Built maps are kept in use order. `evict_idle_maps` drops the least recently
+used ones beyond `RESIDENT_MAPS`, back to their definitions; the next lookup
+rebuilds them identically. Maps that can not be rebuilt that way stay
+resident: pinned ones (`pin_map`, for definitions edited at runtime such as
+a newly opened gate), maps assigned directly, and streamed maps, whose chunk
+store holds the player's changes. Runtime npcs and flags of a left map live in
+`state.parked_maps`, not in its definition, so evicting it loses nothing.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Callable, Iterator, MutableMapping
+from dataclasses import dataclass, field
+
+from csp import maps
+from csp.mapfiles import map_sources
+from csp.maps import MapDef
+
+# Built maps kept beyond the pinned ones before the least recently used go
+RESIDENT_MAPS: int = 4
+
+
+@dataclass
+class MapRegistry(MutableMapping[str, MapDef]):
+    # Map id -> zero-argument factory for a fresh definition
+    sources: dict[str, Callable[[], MapDef]] = field(default_factory=dict)
+    # Built maps, least recently used first
+    built: OrderedDict[str, MapDef] = field(default_factory=OrderedDict)
+    # Ids that must not be evicted
+    pinned: set[str] = field(default_factory=set)
+
+    def __getitem__(self, map_id: str) -> MapDef:
+        m = self.built.get(map_id)
+        if m is not None:
+            self.built.move_to_end(map_id)
+            return m
+        source = self.sources[map_id]
+        m = self.built[map_id] = source()
+        return m
+
+    def __setitem__(self, map_id: str, m: MapDef) -> None:
+        # No definition to fall back to: keep it for good
+        self.sources.pop(map_id, None)
+        self.built[map_id] = m
+        self.built.move_to_end(map_id)
+        self.pinned.add(map_id)
+
+    def __delitem__(self, map_id: str) -> None:
+        if map_id not in self:
+            raise KeyError(map_id)
+        self.sources.pop(map_id, None)
+        self.built.pop(map_id, None)
+        self.pinned.discard(map_id)
+
+    def __contains__(self, map_id: object) -> bool:
+        return map_id in self.sources or map_id in self.built
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.sources
+        for map_id in self.built:
+            if map_id not in self.sources:
+                yield map_id
+
+    def __len__(self) -> int:
+        return len(self.sources) + sum(1 for k in self.built if k not in self.sources)
+
+
+def load_maps() -> MapRegistry:
+    """Registry of every map: the map files, then the builders (a builder wins on a shared id)."""
+    sources = map_sources()
+    sources.update(maps.BUILDERS)
+    return MapRegistry(sources=sources)
+
+
+def pin_map(registry: MapRegistry, map_id: str) -> None:
+    """Keep a map resident (call before editing its definition at runtime)."""
+    registry[map_id]
+    registry.pinned.add(map_id)
+
+
+def evict_idle_maps(registry: MapRegistry, keep: str | None = None) -> None:
+    """Drop least recently used rebuildable maps beyond `RESIDENT_MAPS` (never `keep`)."""
+    evictable = [
+        map_id
+        for map_id, m in registry.built.items()
+        if map_id != keep and map_id not in registry.pinned and m.stream is None
+    ]
+    for map_id in evictable[: max(0, len(evictable) - RESIDENT_MAPS)]:
+        del registry.built[map_id]
@@ -1,38 +1,64 @@
 from __future__ import annotations
 
+from csp.chunks import enter_stream, leave_stream
 from csp.common import Direction
-from csp.maps import Warp
-from csp.tiles import Tile
+from csp.flags import has_flag
+from csp.map_registry import evict_idle_maps, pin_map
+from csp.maps import Warp, remove_wall
 from csp.messages import log
+from csp.npc_index import npcs_with_behavior, rebuild_npc_index, set_behavior
+from csp.offscreen import catch_up, drop_parked_grid, park_map
 from csp.state import State
+from csp.tilegrid import bake_map_tiles, install_tile_grid, reset_tile_grid, set_tile
+from csp.worldgraph import invalidate_world_graph
 
 
 def load_map(state: State, map_id: str, spawn_pos: tuple[int, int] | None = None) -> None:
     m = state.maps[map_id]
+    old = state.maps.get(state.current_map_id or "")
+    if old is not None and old.stream is not None:
+        # Streamed maps keep their npcs and tile edits in their chunks
+        leave_stream(state, old)
+    else:
+        # Keep the outgoing map's runtime; it is swapped back in (with catch-up) on return
+        park_map(state)
     state.current_map_id = map_id
-    # Solid tiles (walls + additional solids)
-    solids = set(m.walls) | set(getattr(m, "solid_tiles", set()))
+    evict_idle_maps(state.maps, keep=map_id)
+    if m.stream is not None:
+        state.flags_map = {}
+        state.debug_shapes = []
+        enter_stream(state, m, spawn_pos)
+        return
+    parked = state.parked_maps.pop(map_id, None)
+    state.stream_origin = (0, 0)
     state.map_warps = dict(m.warps)
     state.map_cols, state.map_rows = m.size
-    # Runtime tiles
-    state.map_tiles = {}
-    for (x, y) in solids:
-        state.map_tiles[(x, y)] = Tile(name="Wall", sprite=None, collidable=True, tag="wall")
-    # Deep copy entities positions (simple copy ok for our Entity)
-    state.npcs = [_copy_entity(e) for e in m.npcs]
-    state.npcs.extend([_copy_entity(e) for e in m.enemies])
-    # Position player
-    if spawn_pos is not None:
-        state.player.x, state.player.y = spawn_pos
-    else:
-        # Ensure player within bounds; if not, center them in the map
-        if not (0 <= state.player.x < state.map_cols and 0 <= state.player.y < state.map_rows):
-            state.player.x = state.map_cols // 2
-            state.player.y = state.map_rows // 2
     # Clear per-map debug
     state.debug_shapes = []
-    # Clear per-map flags
-    state.flags_map.clear()
+    if parked is not None:
+        # Back on a map left earlier: swap its runtime back in (on_load already ran)
+        state.map_tiles = parked.map_tiles
+        if parked.tile_kinds is not None and parked.collision is not None:
+            install_tile_grid(state, parked.tile_kinds, parked.collision)
+        else:
+            reset_tile_grid(state, set(m.walls) | m.solid_tiles, m.wall_bits, m.wall_sprite)
+            bake_map_tiles(state)
+        state.npcs = parked.npcs
+        state.flags_map = parked.flags_map
+        _place_player(state, spawn_pos)
+        rebuild_npc_index(state)
+        catch_up(state, state.turn_count - parked.turn)
+        return
+    # Walls go straight into the dense grid; map_tiles only holds placed tiles
+    state.map_tiles = dict(m.tiles)
+    reset_tile_grid(state, set(m.walls) | m.solid_tiles, m.wall_bits, m.wall_sprite)
+    # First visit: deep copy entities positions (simple copy ok for our Entity)
+    state.npcs = [_copy_entity(e) for e in m.npcs]
+    state.npcs.extend([_copy_entity(e) for e in m.enemies])
+    state.flags_map = {}
+    _place_player(state, spawn_pos)
+    # Index the fresh npcs; on_load hooks hide/spawn through csp.npc_index
+    rebuild_npc_index(state)
     # Per-map on-load hook (can add/modify tiles and npcs)
     if getattr(m, "on_load", None):
         try:
@@ -40,6 +66,18 @@ def load_map(state: State, map_id: str, spawn_pos: tuple[int, int] | None = None
         except Exception:
             # Non-fatal; continue
             pass
+    # The map's placed tiles and any on_load adds live in map_tiles; stamp them into the grid
+    bake_map_tiles(state)
+
+
+def _place_player(state: State, spawn_pos: tuple[int, int] | None) -> None:
+    if spawn_pos is not None:
+        state.player.x, state.player.y = spawn_pos
+    else:
+        # Ensure player within bounds; if not, center them in the map
+        if not (0 <= state.player.x < state.map_cols and 0 <= state.player.y < state.map_rows):
+            state.player.x = state.map_cols // 2
+            state.player.y = state.map_rows // 2
 
 
 def _copy_entity(e):
@@ -55,6 +93,7 @@ def _copy_entity(e):
         e.behavior,
         alignment=getattr(e, "alignment", "neutral"),
         attackable=getattr(e, "attackable", False),
+        speed=getattr(e, "speed", 100),
     )
     c.health = e.health
     c.inventory = dict(e.inventory)
@@ -90,15 +129,11 @@ def process_triggers_after_move(state: State) -> None:
         return
     if t.tag == "leaves":
         # Consume leaves and wake nearby sleeping bears
-        try:
-            del state.map_tiles[(px, py)]
-        except KeyError:
-            pass
+        set_tile(state, (px, py), None)
         woke = 0
-        for be in state.npcs:
-            if getattr(be, "behavior", None) == "bear_sleep":
-                be.behavior = "bear"
-                woke += 1
+        for be in list(npcs_with_behavior(state, "bear_sleep")):
+            set_behavior(state, be, "bear")
+            woke += 1
         if woke:
             log(state, "You step on crunchy leaves. A bear wakes up!")
 
@@ -116,30 +151,39 @@ def _dir_matches(d: Direction, need: str) -> bool:
 
 
 def open_start_left_path(state: State) -> None:
+    if _open_west_gate(state):
+        log(state, "You hear a mechanism unlocking to the west.")
+
+
+def reapply_map_edits(state: State, map_id: str) -> None:
+    """Redo runtime edits of a map definition after it is rebuilt (a map file reload)."""
+    if map_id == "start_area" and has_flag(state, "start_area.riddle_solved"):
+        _open_west_gate(state)
+
+
+def _open_west_gate(state: State) -> bool:
     # Open west gate in start_area and add warp to riddle_room
     if "start_area" not in state.maps or "riddle_room" not in state.maps:
-        from csp.messages import log
-
         log(state, "[debug] Missing maps for left path.")
-        return
+        return False
+    # The edited definition must outlive eviction
+    pin_map(state.maps, "start_area")
     start = state.maps["start_area"]
     s_cols, s_rows = start.size
     west_gate = (0, s_rows // 2)
     # Update map def
-    start.walls.discard(west_gate)
+    remove_wall(start, west_gate)
     start.warps[west_gate] = Warp(
         target_map_id="riddle_room",
         target_pos=(state.maps["riddle_room"].size[0] - 2, state.maps["riddle_room"].size[1] // 2),
         sideexit_dir="left",
     )
+    invalidate_world_graph(state)
+    # A parked start area rebuilds its grids from the edited definition on return
+    drop_parked_grid(state, "start_area")
     # If currently in start, update runtime too
     if state.current_map_id == "start_area":
         # Remove wall tile at west gate (make passable)
-        try:
-            del state.map_tiles[west_gate]
-        except KeyError:
-            pass
+        set_tile(state, west_gate, None)
         state.map_warps[west_gate] = start.warps[west_gate]
-    from csp.messages import log
-
-    log(state, "You hear a mechanism unlocking to the west.")
+    return True
@@ -0,0 +1,372 @@
+"""Declarative map files: an ASCII layout plus a TOML legend, in maps/<id>.toml.
+
+    name = "Forest A"
+    base_light = 170
+    wall_sprite = "tree_wall"      # optional, walls drawn with this sprite
+    on_load = "_on_load_forest_b"  # optional hook, by name in csp.maps
+    layout = '''
+    ####^###
+    #..r...>
+    ########
+    '''
+
+    [legend]
+    "#" = "wall"                   # or "floor", "solid", "noise"
+    "." = "floor"
+
+    [legend.r]                     # a placed tile
+    tile = "Rock"
+    sprite = "rock"
+    collidable = true
+    tag = "rock"
+
+    [legend.">"]                   # a warp
+    warp = "forest_d"
+    to = [1, 8]
+    side = "right"
+
+    [legend.p]                     # an entity; other keys (health, sprite_name...)
+    entity = "Pig"                 # become attributes, hostile ones are enemies
+    char = "p"
+    color = [200, 120, 120]
+    description = "Charges if close"
+    behavior = "pig"
+
+Warps, tiles and entities stand on floor. `compile_map_file` turns a file into
+a compiled record of plain tuples: walls are packed with one `str.translate`
+and one base-2 `int` conversion of the whole layout (`MapDef.wall_bits`, which
+`load_map` expands straight into the tile grids), and only the cells holding
+warps, tiles and entities are visited one by one, so compiling costs time in
+proportion to the file, not to Python statements. A record holds:
+
+- warps as (x, y, target map, target x, target y, side exit) tuples
+- placed tiles as (x, y, name, sprite, collidable, tag) tuples
+- npcs and enemies as entity prototypes (constructor args plus extra attributes)
+- hooks (`on_load`, `step`) by their name in csp.maps
+
+Compiled records are kept per file and modification time, and every lookup of
+a map decodes a fresh `MapDef` from its record. While the game runs,
+`reload_changed_maps` rechecks the files every `WATCH_INTERVAL` seconds and
+recompiles only those that changed; the next lookup of such a map gets the new
+version, and the current map reloads in place.
+"""
+
+from __future__ import annotations
+
+import time
+import tomllib
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from csp import maps
+from csp.assets import asset_path
+from csp.entities import Entity
+from csp.maps import MapDef, Warp
+from csp.tiles import Tile
+
+if TYPE_CHECKING:
+    from csp.state import State
+
+# Seconds between modification-time checks while the game runs
+WATCH_INTERVAL: float = 0.5
+
+_SIMPLE_KINDS = ("wall", "floor", "solid", "noise")
+_ENTITY_KEYS = (
+    "entity",
+    "char",
+    "color",
+    "description",
+    "behavior",
+    "alignment",
+    "attackable",
+    "speed",
+)
+# Entity constructor arguments kept in a prototype; other attributes go in its extras
+_PROTO_ARGS = (
+    "x",
+    "y",
+    "char",
+    "color",
+    "name",
+    "description",
+    "behavior",
+    "alignment",
+    "attackable",
+    "speed",
+)
+
+# Map file -> (mtime_ns it was compiled at, compiled record)
+_compiled: dict[Path, tuple[int, tuple]] = {}
+# Map file -> mtime_ns of a version that failed to compile
+_failed: dict[Path, int] = {}
+_next_check: float = 0.0
+
+
+class MapFileError(ValueError):
+    pass
+
+
+def map_dir() -> Path:
+    return asset_path("maps")
+
+
+def map_sources() -> dict[str, Callable[[], MapDef]]:
+    """Map id -> loader for every map file, for the map registry."""
+    return {path.stem: partial(load_map_file, path) for path in sorted(map_dir().glob("*.toml"))}
+
+
+def load_map_file(path: Path) -> MapDef:
+    """A fresh `MapDef` from a map file, recompiling it only if it changed."""
+    mtime = path.stat().st_mtime_ns
+    hit = _compiled.get(path)
+    if hit is None or (hit[0] != mtime and _failed.get(path) != mtime):
+        try:
+            hit = _compiled[path] = (mtime, compile_map_file(path))
+        except MapFileError:
+            if hit is None:
+                raise
+            # Mid-edit: keep playing the last good version
+            _failed[path] = mtime
+    return _decode_map(hit[1])
+
+
+def compile_map_file(path: Path) -> tuple:
+    try:
+        data = tomllib.loads(path.read_text(encoding="utf-8"))
+    except (OSError, UnicodeDecodeError, tomllib.TOMLDecodeError) as exc:
+        raise MapFileError(f"{path}: {exc}") from exc
+    try:
+        return compile_map_data(path.stem, data)
+    except (KeyError, TypeError, ValueError) as exc:
+        raise MapFileError(f"{path}: {exc}") from exc
+
+
+def compile_map_data(map_id: str, data: dict[str, Any]) -> tuple:
+    """Compile a parsed map file into a record (see the module docstring)."""
+    lines = data["layout"].strip("\n").split("\n")
+    cols, rows = len(lines[0]), len(lines)
+    if cols == 0:
+        raise ValueError("empty layout")
+    for y, line in enumerate(lines):
+        if len(line) != cols:
+            raise ValueError(f"layout row {y} is {len(line)} wide, expected {cols}")
+    flat = "".join(lines)
+    legend: dict[str, Any] = data.get("legend", {})
+    for ch in legend:
+        if len(ch) != 1:
+            raise ValueError(f"legend key {ch!r} must be a single character")
+    unknown = set(flat) - legend.keys()
+    if unknown:
+        ch = min(unknown, key=flat.index)
+        i = flat.index(ch)
+        raise ValueError(f"layout char {ch!r} at {(i % cols, i // cols)} is not in the legend")
+
+    is_wall = "".join("1" if kind == "wall" else "0" for kind in legend.values())
+    bits = flat.translate(str.maketrans("".join(legend), is_wall))
+    # Bit i of the little-endian integer is cell i (see MapDef.wall_bits)
+    wall_bits = int(bits[::-1], 2).to_bytes((cols * rows + 7) // 8, "little")
+
+    solid: list[tuple[int, int]] = []
+    noise: list[tuple[int, int]] = []
+    warps: list[tuple] = []
+    tiles: list[tuple] = []
+    placed: list[tuple[int, Entity]] = []
+    for ch, spec in legend.items():
+        if isinstance(spec, str) and spec not in _SIMPLE_KINDS:
+            raise ValueError(f"legend {ch!r}: unknown kind {spec!r}")
+        if spec in ("wall", "floor"):
+            continue
+        i = flat.find(ch)
+        while i != -1:
+            x, y = i % cols, i // cols
+            if spec == "solid":
+                solid.append((x, y))
+            elif spec == "noise":
+                noise.append((x, y))
+            elif "warp" in spec:
+                tx, ty = spec["to"]
+                warps.append((x, y, spec["warp"], tx, ty, spec.get("side")))
+            elif "tile" in spec:
+                tiles.append(
+                    (
+                        x,
+                        y,
+                        spec["tile"],
+                        spec.get("sprite"),
+                        spec.get("collidable", False),
+                        spec.get("tag"),
+                    )
+                )
+            elif "entity" in spec:
+                placed.append((i, _make_entity(x, y, spec)))
+            else:
+                raise ValueError(f"legend {ch!r} needs one of warp, tile or entity")
+            i = flat.find(ch, i + 1)
+    placed.sort(key=lambda p: p[0])
+    npcs = tuple(_encode_entity(e) for _, e in placed if e.alignment != "hostile")
+    enemies = tuple(_encode_entity(e) for _, e in placed if e.alignment == "hostile")
+    return (
+        map_id,
+        data.get("name", map_id),
+        (cols, rows),
+        wall_bits,
+        tuple(solid),
+        tuple(noise),
+        tuple(warps),
+        npcs,
+        enemies,
+        _hook_name(data.get("step")),
+        _hook_name(data.get("on_load")),
+        data.get("base_light", 255),
+        tuple(tiles),
+        data.get("wall_sprite"),
+    )
+
+
+def reload_changed_maps(state: State) -> list[str]:
+    """Recompile map files edited since they were loaded; return their ids.
+
+    Checks at most every `WATCH_INTERVAL` seconds. A file that fails to compile
+    is reported in the log and the old version stays in use. Runtime edits of a
+    reloaded map's definition are redone on the new one (see
+    `map_runtime.reapply_map_edits`); the runtime itself (npcs, tile changes)
+    restarts from the file.
+    """
+    global _next_check
+    now = time.monotonic()
+    if now < _next_check:
+        return []
+    _next_check = now + WATCH_INTERVAL
+    from csp.map_runtime import load_map, reapply_map_edits
+    from csp.messages import log
+    from csp.worldgraph import invalidate_world_graph
+
+    changed = []
+    for path in sorted(map_dir().glob("*.toml")):
+        map_id = path.stem
+        hit = _compiled.get(path)
+        known = map_id in state.maps.sources
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            continue
+        if known and (hit is None or hit[0] == mtime):
+            # Never loaded yet (compiled on first use) or unchanged
+            continue
+        if _failed.get(path) == mtime:
+            continue
+        try:
+            _compiled[path] = (mtime, compile_map_file(path))
+        except MapFileError as exc:
+            # Keep the old version until the file changes again
+            _failed[path] = mtime
+            log(state, f"[maps] {exc}")
+            continue
+        state.maps.sources[map_id] = partial(load_map_file, path)
+        state.maps.built.pop(map_id, None)
+        state.maps.pinned.discard(map_id)
+        # A parked runtime would bring back the old layout on return
+        state.parked_maps.pop(map_id, None)
+        invalidate_world_graph(state)
+        # Runtime edits of the old definition (an opened gate) carry over
+        reapply_map_edits(state, map_id)
+        changed.append(map_id)
+        if state.current_map_id == map_id:
+            cols, rows = state.maps[map_id].size
+            p = state.player
+            pos = (p.x, p.y) if 0 <= p.x < cols and 0 <= p.y < rows else None
+            # Start over from the file: do not park the stale runtime
+            state.current_map_id = None
+            load_map(state, map_id, spawn_pos=pos)
+        log(state, f"[maps] reloaded {map_id}")
+    return changed
+
+
+def _make_entity(x: int, y: int, spec: dict[str, Any]) -> Entity:
+    e = Entity(
+        x,
+        y,
+        spec["char"],
+        tuple(spec["color"]),
+        spec["entity"],
+        spec.get("description", ""),
+        spec.get("behavior"),
+        alignment=spec.get("alignment", "neutral"),
+        attackable=spec.get("attackable", False),
+        speed=spec.get("speed", 100),
+    )
+    for key, value in spec.items():
+        if key not in _ENTITY_KEYS:
+            setattr(e, key, value)
+    return e
+
+
+def _hook_name(name: str | None) -> str | None:
+    if name is not None and not callable(getattr(maps, name, None)):
+        raise ValueError(f"no hook {name!r} in csp.maps")
+    return name
+
+
+def _hook(name: str | None) -> Callable[[State], None] | None:
+    return None if name is None else getattr(maps, name)
+
+
+def _decode_map(rec: tuple) -> MapDef:
+    (
+        map_id,
+        name,
+        size,
+        wall_bits,
+        solid_tiles,
+        noise_tiles,
+        warps,
+        npcs,
+        enemies,
+        step,
+        on_load,
+        light,
+        tiles,
+        wall_sprite,
+    ) = rec
+    return MapDef(
+        id=map_id,
+        name=name,
+        size=size,
+        wall_bits=bytearray(wall_bits),
+        warps={(x, y): Warp(target, (tx, ty), side) for x, y, target, tx, ty, side in warps},
+        npcs=[_decode_entity(p) for p in npcs],
+        enemies=[_decode_entity(p) for p in enemies],
+        step=_hook(step),
+        on_load=_hook(on_load),
+        solid_tiles=set(solid_tiles),
+        base_light=light,
+        noise_tiles=set(noise_tiles),
+        tiles={(x, y): Tile(name, sprite, solid, tag) for x, y, name, sprite, solid, tag in tiles},
+        wall_sprite=wall_sprite,
+    )
+
+
+def _encode_entity(e: Entity) -> tuple:
+    extra = {k: v for k, v in vars(e).items() if k not in _PROTO_ARGS}
+    return (tuple(getattr(e, k) for k in _PROTO_ARGS), extra)
+
+
+def _decode_entity(proto: tuple) -> Entity:
+    args, extra = proto
+    x, y, char, color, name, description, behavior, alignment, attackable, speed = args
+    e = Entity(
+        x,
+        y,
+        char,
+        color,
+        name,
+        description,
+        behavior,
+        alignment=alignment,
+        attackable=attackable,
+        speed=speed,
+    )
+    vars(e).update(extra)
+    return e
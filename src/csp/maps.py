@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import random
 from collections.abc import Callable
 from dataclasses import dataclass, field
 
 from csp.entities import Entity
+from csp.tiles import Tile
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
+    from csp.chunks import Chunk, ChunkStore
     from csp.state import State
 
 
@@ -30,401 +33,153 @@ class MapDef:
     on_load: Callable[["State"], None] | None = None
     # Additional tile metadata
     solid_tiles: set[tuple[int, int]] = field(default_factory=set)  # collidable tiles (like walls)
+    # Ambient light, 0 (pitch dark) to 255 (daylight); see csp.lighting
+    base_light: int = 255
     noise_tiles: set[tuple[int, int]] = field(default_factory=set)  # non-collidable triggers
+    # Packed walls (row-major bitmap, bit y * cols + x); when set it is the wall
+    # layout and `walls` stays empty. Map files compile to it (see csp.mapfiles)
+    wall_bits: bytearray | None = None
+    # Placed tiles (torches, rocks, furniture...) copied into state.map_tiles on load
+    tiles: dict[tuple[int, int], Tile] = field(default_factory=dict)
+    # Sprite walls are drawn with (e.g. 'tree_wall'); None for the plain wall
+    wall_sprite: str | None = None
+    # Streamed overworld: walls, tiles and npcs live in chunks instead (see csp.chunks);
+    # size is then the live window and warps are keyed by world cell
+    stream: ChunkStore | None = None
 
 
-def _border_walls(cols: int, rows: int) -> set[tuple[int, int]]:
-    walls: set[tuple[int, int]] = set()
-    for x in range(cols):
-        walls.add((x, 0))
-        walls.add((x, rows - 1))
-    for y in range(rows):
-        walls.add((0, y))
-        walls.add((cols - 1, y))
-    return walls
+# Byte -> its 8 bits as 0/1 bytes, least significant first
+_BITS: list[bytes] = [bytes((b >> i) & 1 for i in range(8)) for b in range(256)]
 
 
-def make_start_area() -> MapDef:
-    # Start area with a central sign. East to Woods Entrance. North to Town Shop.
-    cols, rows = 24, 16
-    walls: set[tuple[int, int]] = set()
-    walls.update(_border_walls(cols, rows))
-
-    # Carve warp tiles in the border
-    east_gate = (cols - 1, rows // 2)
-    north_gate = (cols // 2, 0)
-    # Make them walkable (remove wall) and mark as warp
-    walls.discard(east_gate)
-    walls.discard(north_gate)
-
-    warps: dict[tuple[int, int], Warp] = {
-        east_gate: Warp(
-            target_map_id="woods_entrance", target_pos=(1, rows // 2), sideexit_dir="right"
-        ),
-        north_gate: Warp(
-            target_map_id="town_shop", target_pos=(cols // 2, rows - 2), sideexit_dir="up"
-        ),
-    }
+def unpack_grid(packed: bytes | bytearray, cols: int, rows: int) -> bytearray:
+    """One byte (0/1) per cell from a packed bitmap (see `MapDef.wall_bits`)."""
+    return bytearray(b"".join(map(_BITS.__getitem__, packed))[: cols * rows])
 
-    # Sign and Sage near the center
-    sign = Entity(cols // 2, rows // 2, "?", (200, 200, 100), "Sign", "Directions", behavior="sign")
-    sage = Entity(
-        cols // 2 - 2, rows // 2, "S", (200, 200, 255), "Sage", "Riddle giver", behavior="sage"
-    )
 
-    return MapDef(
-        id="start_area",
-        name="Start",
-        size=(cols, rows),
-        walls=walls,
-        warps=warps,
-        npcs=[sign, sage],
-        enemies=[],
-        step=None,
-    )
+def wall_cells(m: MapDef) -> set[tuple[int, int]]:
+    """The map's wall cells, whichever way they are stored."""
+    if m.wall_bits is None:
+        return set(m.walls)
+    cols = m.size[0]
+    grid = unpack_grid(m.wall_bits, *m.size)
+    return {(i % cols, i // cols) for i, v in enumerate(grid) if v}
 
 
-def make_woods_entrance() -> MapDef:
-    cols, rows = 24, 16
-    walls: set[tuple[int, int]] = set()
-    walls.update(_border_walls(cols, rows))
-
-    west_gate = (0, rows // 2)
-    east_gate = (cols - 1, rows // 2)
-    walls.discard(west_gate)
-    walls.discard(east_gate)
-    warps: dict[tuple[int, int], Warp] = {
-        west_gate: Warp(
-            target_map_id="start_area", target_pos=(cols - 2, rows // 2), sideexit_dir="left"
-        ),
-        east_gate: Warp(
-            target_map_id="forest_a", target_pos=(1, rows // 2), sideexit_dir="right"
-        ),
-    }
-
-    trapper = Entity(
-        5, rows // 2, "T", (150, 75, 0), "Lazy Trapper", "Trades meat for gold", behavior="trader"
-    )
-
-    def _on_load(state: "State") -> None:
-        from csp.tiles import Tile
-        # Render all walls as tree walls
-        for (pos, tile) in list(state.map_tiles.items()):
-            if tile.tag == "wall":
-                tile.sprite = "tree_wall"
-        # Ground decoration near trapper
-        bag_pos = (6, rows // 2)
-        state.map_tiles[bag_pos] = Tile(name="Bag", sprite="bag", collidable=False, tag="decor")
-
-    return MapDef(
-        id="woods_entrance",
-        name="Woods Entrance",
-        size=(cols, rows),
-        walls=walls,
-        warps=warps,
-        npcs=[trapper],
-        enemies=[],
-        step=None,
-        on_load=_on_load,
-    )
-
-
-def make_bunny_area() -> MapDef:
-    cols, rows = 24, 16
-    walls: set[tuple[int, int]] = set()
-    walls.update(_border_walls(cols, rows))
-
-    west_gate = (0, rows // 2)
-    walls.discard(west_gate)
-    warps: dict[tuple[int, int], Warp] = {
-        west_gate: Warp(
-            target_map_id="forest_d", target_pos=(cols - 2, rows // 2), sideexit_dir="left"
-        )
-    }
-
-    # Bunny hole (hut) near center-right
-    hole = Entity(
-        cols // 2 + 6,
-        rows // 2,
-        "o",
-        (240, 240, 240),
-        "Bunny Hole",
-        "Spawns bunnies",
-        behavior="hut",
-    )
-
-    return MapDef(
-        id="bunny_area",
-        name="Bunny Glade",
-        size=(cols, rows),
-        walls=walls,
-        warps=warps,
-        npcs=[hole],
-        enemies=[],
-        step=None,
-    )
-
-
-def make_town_shop() -> MapDef:
-    cols, rows = 24, 16
-    walls: set[tuple[int, int]] = set()
-    walls.update(_border_walls(cols, rows))
-
-    south_gate = (cols // 2, rows - 1)
-    walls.discard(south_gate)
-    warps: dict[tuple[int, int], Warp] = {
-        south_gate: Warp(target_map_id="start_area", target_pos=(cols // 2, 1), sideexit_dir="down")
-    }
-
-    # One shop in the middle
-    shop_npc = Entity(
-        cols // 2,
-        rows // 2,
-        "I",
-        (70, 200, 70),
-        "Item Shop",
-        "Sells powerful gear",
-        behavior="shop",
-    )
-    # Use the curated shop sprite asset (sprites/shop.png)
-    try:
-        shop_npc.sprite_name = "shop"
-    except Exception:
-        pass
-
-    def _on_load(state: "State") -> None:
-        from csp.tiles import Tile
-        # Stone walls visuals
-        for (pos, tile) in list(state.map_tiles.items()):
-            if tile.tag == "wall":
-                tile.sprite = "stone_wall"
-        # Furniture
-        cx, cy = cols // 2, rows // 2
-        state.map_tiles[(cx - 2, cy)] = Tile(name="Table", sprite="table", collidable=True, tag="furniture")
-        state.map_tiles[(cx + 2, cy)] = Tile(name="Pillar", sprite="pillar", collidable=True, tag="furniture")
-
-    return MapDef(
-        id="town_shop",
-        name="Town Shop",
-        size=(cols, rows),
-        walls=walls,
-        warps=warps,
-        npcs=[shop_npc],
-        enemies=[],
-        step=None,
-        on_load=_on_load,
-    )
+def remove_wall(m: MapDef, pos: tuple[int, int]) -> None:
+    m.walls.discard(pos)
+    if m.wall_bits is not None:
+        i = pos[1] * m.size[0] + pos[0]
+        m.wall_bits[i >> 3] &= ~(1 << (i & 7)) & 0xFF
 
 
-def make_riddle_room() -> MapDef:
-    cols, rows = 16, 12
-    walls: set[tuple[int, int]] = set()
-    walls.update(_border_walls(cols, rows))
-
-    east_gate = (cols - 1, rows // 2)
-    walls.discard(east_gate)
-    # Note: start_area has 16 rows; re-enter centered vertically (y=8)
-    warps: dict[tuple[int, int], Warp] = {
-        east_gate: Warp(target_map_id="start_area", target_pos=(1, 8), sideexit_dir="right")
-    }
-
-    # Gold pickup in center
-    gold = Entity(
-        cols // 2, rows // 2, "$", (255, 215, 0), "Gold", "Shiny coin pile", behavior="gold"
-    )
-    # Decorative torches as solid tiles
-    solid_tiles = {(3, 2), (cols - 4, 2)}
-
-    def _on_load(state: "State") -> None:
-        # If the player already took the gold, do not spawn any gold piles
-        from csp.map_helpers import hide_by_behavior_if_flag
-        from csp.tiles import Tile
-        hide_by_behavior_if_flag(state, behavior="gold", flag="riddle_room.gold_taken")
-        # Place torches as collidable tiles with images
-        state.map_tiles[(3, 2)] = Tile(name="Torch", sprite="torch", collidable=True, tag="torch")
-        state.map_tiles[(cols - 4, 2)] = Tile(name="Torch", sprite="torch", collidable=True, tag="torch")
-
-    return MapDef(
-        id="riddle_room",
-        name="Hidden Vault",
-        size=(cols, rows),
-        walls=walls,
-        warps=warps,
-        npcs=[gold],
-        enemies=[],
-        step=None,
-        on_load=_on_load,
-        solid_tiles=solid_tiles,
-    )
-
-
-def make_forest_a() -> MapDef:
-    cols, rows = 24, 16
-    walls: set[tuple[int, int]] = set()
-    walls.update(_border_walls(cols, rows))
-    west_gate = (0, rows // 2)
-    east_gate = (cols - 1, rows // 2)
-    north_gate = (cols // 2, 0)
-    walls.discard(west_gate)
-    walls.discard(east_gate)
-    walls.discard(north_gate)
-    warps = {
-        west_gate: Warp(target_map_id="woods_entrance", target_pos=(cols - 2, rows // 2), sideexit_dir="left"),
-        east_gate: Warp(target_map_id="forest_d", target_pos=(1, rows // 2), sideexit_dir="right"),
-        north_gate: Warp(target_map_id="forest_b", target_pos=(cols // 2, rows - 2), sideexit_dir="up"),
-    }
-    def _on_load(state: "State") -> None:
-        from csp.tiles import Tile
-        # Forest walls as trees
-        for (pos, tile) in list(state.map_tiles.items()):
-            if tile.tag == "wall":
-                tile.sprite = "tree_wall"
-        # Scatter some rocks and grass
-        for pos in {(4, 4), (7, 9), (10, 3)}:
-            state.map_tiles[pos] = Tile(name="Rock", sprite="rock", collidable=True, tag="rock")
-        for pos in {(5, 6), (9, 5), (12, 7)}:
-            state.map_tiles[pos] = Tile(name="Grass", sprite="grass_tuft", collidable=False, tag="grass")
-
-    return MapDef(
-        id="forest_a",
-        name="Forest A",
-        size=(cols, rows),
-        walls=walls,
-        warps=warps,
-        npcs=[],
-        enemies=[],
-        step=None,
-        on_load=_on_load,
-    )
-
-
-def make_forest_b() -> MapDef:
-    cols, rows = 24, 16
-    walls: set[tuple[int, int]] = set()
-    walls.update(_border_walls(cols, rows))
-    south_gate = (cols // 2, rows - 1)
-    east_gate = (cols - 1, rows // 2)
-    walls.discard(south_gate)
-    walls.discard(east_gate)
-    warps = {
-        south_gate: Warp(target_map_id="forest_a", target_pos=(cols // 2, 1), sideexit_dir="down"),
-        east_gate: Warp(target_map_id="forest_c", target_pos=(1, rows // 2), sideexit_dir="right"),
-    }
-    # One pig that charges
-    pig = Entity(cols // 2 - 3, rows // 2, "p", (200, 120, 120), "Pig", "Charges if close", behavior="pig", alignment="hostile", attackable=True)
-    pig.health = 3
-    def _on_load(state: "State") -> None:
-        from csp.map_helpers import hide_by_name_if_flag
-        from csp.tiles import Tile
-        hide_by_name_if_flag(state, names=["Pig"], flag="forest_b.pig_dead")
-        # Tree walls visuals and some scatter decorations
-        for (pos, tile) in list(state.map_tiles.items()):
-            if tile.tag == "wall":
-                tile.sprite = "tree_wall"
-        for pos in {(6, 4), (12, 11)}:
-            state.map_tiles[pos] = Tile(name="Rock", sprite="rock", collidable=True, tag="rock")
-        for pos in {(8, 6), (14, 7)}:
-            state.map_tiles[pos] = Tile(name="Grass", sprite="grass_tuft", collidable=False, tag="grass")
-    return MapDef(
-        id="forest_b",
-        name="Forest B",
-        size=(cols, rows),
-        walls=walls,
-        warps=warps,
-        npcs=[],
-        enemies=[pig],
-        step=None,
-        on_load=_on_load,
-    )
-
-
-def make_forest_c() -> MapDef:
-    cols, rows = 24, 16
+def _border_walls(cols: int, rows: int) -> set[tuple[int, int]]:
     walls: set[tuple[int, int]] = set()
-    walls.update(_border_walls(cols, rows))
-    south_gate = (cols // 2, rows - 1)
-    west_gate = (0, rows // 2)
-    walls.discard(south_gate)
-    walls.discard(west_gate)
-    warps = {
-        south_gate: Warp(target_map_id="forest_d", target_pos=(cols // 2, 1), sideexit_dir="down"),
-        west_gate: Warp(target_map_id="forest_b", target_pos=(cols - 2, rows // 2), sideexit_dir="left"),
-    }
-    # Sleeping bear; noise tiles set in on_load
-    bear = Entity(cols // 2 + 3, rows // 2, "B", (120, 80, 40), "Bear", "Do not wake", behavior="bear_sleep", alignment="hostile", attackable=True)
-    def _on_load(state: "State") -> None:
-        from csp.map_helpers import hide_by_name_if_flag
-        from csp.tiles import Tile
-        hide_by_name_if_flag(state, names=["Bear"], flag="forest_c.bear_dead")
-        # Tree walls visuals
-        for (pos, tile) in list(state.map_tiles.items()):
-            if tile.tag == "wall":
-                tile.sprite = "tree_wall"
-        leaves = {(5, 5), (8, 7), (12, 4), (6, 9), (10, 6), (14, 8)}
-        for pos in leaves:
-            state.map_tiles[pos] = Tile(name="Leaves", sprite="leaves", collidable=False, tag="leaves")
-        # A few rocks
-        for pos in {(4, 10), (15, 3)}:
-            state.map_tiles[pos] = Tile(name="Rock", sprite="rock", collidable=True, tag="rock")
-    return MapDef(
-        id="forest_c",
-        name="Forest C",
-        size=(cols, rows),
-        walls=walls,
-        warps=warps,
-        npcs=[],
-        enemies=[bear],
-        step=None,
-        on_load=_on_load,
-    )
+    for x in range(cols):
+        walls.add((x, 0))
+        walls.add((x, rows - 1))
+    for y in range(rows):
+        walls.add((0, y))
+        walls.add((cols - 1, y))
+    return walls
 
 
-def make_forest_d() -> MapDef:
-    cols, rows = 24, 16
-    walls: set[tuple[int, int]] = set()
-    walls.update(_border_walls(cols, rows))
-    west_gate = (0, rows // 2)
-    north_gate = (cols // 2, 0)
-    east_gate = (cols - 1, rows // 2)
-    walls.discard(west_gate)
-    walls.discard(north_gate)
-    walls.discard(east_gate)
+# Map hooks, referenced by name from the map files in maps/ (see csp.mapfiles)
+def _on_load_riddle_room(state: "State") -> None:
+    # If the player already took the gold, do not spawn any gold piles
+    from csp.map_helpers import hide_by_behavior_if_flag
+
+    hide_by_behavior_if_flag(state, behavior="gold", flag="riddle_room.gold_taken")
+
+
+def _on_load_forest_b(state: "State") -> None:
+    from csp.map_helpers import hide_by_name_if_flag
+
+    hide_by_name_if_flag(state, names=["Pig"], flag="forest_b.pig_dead")
+
+
+def _on_load_forest_c(state: "State") -> None:
+    from csp.map_helpers import hide_by_name_if_flag
+
+    hide_by_name_if_flag(state, names=["Bear"], flag="forest_c.bear_dead")
+
+
+def _wilds_chunk(seed: int, cx: int, cy: int) -> Chunk:
+    from csp.chunks import CHUNK, Chunk
+    from csp.graphics import COLORS
+    from csp.tilegrid import kind_id
+    from csp.tiles import Tile
+
+    rng = random.Random(f"wilds:{seed}:{cx}:{cy}")
+    chunk = Chunk(cx, cy)
+    tree = kind_id(Tile(name="Wall", sprite="tree_wall", collidable=True, tag="wall"))
+    x0, y0 = cx * CHUNK, cy * CHUNK
+
+    def in_clearing(x: int, y: int) -> bool:
+        # Keep the arrival spot (0, 0) and the way back (0, -1) open
+        return abs(x0 + x) <= 3 and abs(y0 + y) <= 3
+
+    # Tree clumps: short random walks from random seeds
+    for _ in range(rng.randint(4, 9)):
+        x, y = rng.randrange(CHUNK), rng.randrange(CHUNK)
+        for _ in range(rng.randint(6, 30)):
+            if not in_clearing(x, y):
+                chunk.kinds[y * CHUNK + x] = tree
+                chunk.collision[y * CHUNK + x] = 1
+            dx, dy = rng.choice(((1, 0), (-1, 0), (0, 1), (0, -1)))
+            x = min(CHUNK - 1, max(0, x + dx))
+            y = min(CHUNK - 1, max(0, y + dy))
+    # A few critters on open ground
+    taken: set[tuple[int, int]] = set()
+    for _ in range(rng.randint(0, 3)):
+        x, y = rng.randrange(CHUNK), rng.randrange(CHUNK)
+        if chunk.collision[y * CHUNK + x] or in_clearing(x, y) or (x, y) in taken:
+            continue
+        taken.add((x, y))
+        if rng.random() < 0.75:
+            e = Entity(
+                x0 + x,
+                y0 + y,
+                "b",
+                COLORS["bunny"],
+                "Bunny",
+                "Harmless fluff",
+                behavior="random",
+                attackable=True,
+            )
+            e.health = 1
+        else:
+            e = Entity(
+                x0 + x,
+                y0 + y,
+                "S",
+                (120, 80, 200),
+                "Shardling Slime",
+                "Seeps through cracks",
+                behavior="random",
+                attackable=True,
+            )
+        chunk.npcs.append(e)
+    return chunk
+
+
+def make_wilds(seed: int = 0) -> MapDef:
+    # Streamed test overworld, not linked from any shipped map (benchmarks/bench.py runs
+    # it); chunks are generated as you walk
+    from csp.chunks import CHUNK, WINDOW, ChunkStore
+
+    size = WINDOW * CHUNK
     warps = {
-        west_gate: Warp(target_map_id="forest_a", target_pos=(cols - 2, rows // 2), sideexit_dir="left"),
-        north_gate: Warp(target_map_id="forest_c", target_pos=(cols // 2, rows - 2), sideexit_dir="up"),
-        east_gate: Warp(target_map_id="bunny_area", target_pos=(1, rows // 2), sideexit_dir="right"),
+        (0, -1): Warp(target_map_id="start_area", target_pos=(12, 14), sideexit_dir="up"),
     }
-    def _on_load(state: "State") -> None:
-        from csp.tiles import Tile
-        for (pos, tile) in list(state.map_tiles.items()):
-            if tile.tag == "wall":
-                tile.sprite = "tree_wall"
-        # Some grass
-        for pos in {(5, 7), (9, 4), (17, 9)}:
-            state.map_tiles[pos] = Tile(name="Grass", sprite="grass_tuft", collidable=False, tag="grass")
-
     return MapDef(
-        id="forest_d",
-        name="Forest D",
-        size=(cols, rows),
-        walls=walls,
+        id="wilds",
+        name="Wilds",
+        size=(size, size),
         warps=warps,
-        npcs=[],
-        enemies=[],
-        step=None,
-        on_load=_on_load,
+        stream=ChunkStore(seed=seed, generate=_wilds_chunk),
     )
 
 
-def initial_maps() -> dict[str, MapDef]:
-    return {
-        "start_area": make_start_area(),
-        "woods_entrance": make_woods_entrance(),
-        "forest_a": make_forest_a(),
-        "forest_b": make_forest_b(),
-        "forest_c": make_forest_c(),
-        "forest_d": make_forest_d(),
-        "bunny_area": make_bunny_area(),
-        "town_shop": make_town_shop(),
-        "riddle_room": make_riddle_room(),
-    }
+# Maps built in Python (the rest are map files in maps/, see csp.mapfiles)
+BUILDERS: dict[str, Callable[[], MapDef]] = {}
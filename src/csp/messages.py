@@ -5,4 +5,5 @@ from csp.state import State
 
 def log(state: State, text: str) -> None:
     state.message_log.append((text, state.turn_count))
+    state.messages_logged += 1
 
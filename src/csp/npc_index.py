@@ -0,0 +1,150 @@
+"""Runtime indexes over the current map's npcs.
+
+- `state.occupancy`: position -> entities standing there (npcs and the player)
+- `state.npcs_by_behavior` / `state.npcs_by_name`: buckets of npcs (player excluded)
+- `state.scheduler`: when each acting npc is next due (see csp.scheduler)
+
+`load_map` rebuilds them all; afterwards spawn, despawn, move and behavior
+changes go through the helpers below so the indexes stay in step with
+`state.npcs`.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from csp.entities import Entity
+from csp.scheduler import action_delay, reset_schedule, schedule, unschedule
+from csp.state import State
+
+
+def rebuild_npc_index(state: State) -> None:
+    """Rebuild every index from state.npcs and the player."""
+    occ: dict[tuple[int, int], list[Entity]] = {}
+    for e in (*state.npcs, state.player):
+        occ.setdefault((e.x, e.y), []).append(e)
+    state.occupancy = occ
+    state.npcs_by_behavior = {}
+    state.npcs_by_name = {}
+    for e in state.npcs:
+        _bucket(state, e)
+    reset_schedule(state.scheduler, state.npcs)
+
+
+def is_occupied(state: State, x: int, y: int, ignore_entity: object | None = None) -> bool:
+    here = state.occupancy.get((x, y))
+    if not here:
+        return False
+    return any(e is not ignore_entity for e in here)
+
+
+def npcs_with_behavior(state: State, behavior: str) -> list[Entity]:
+    """Npcs on the current map with this behavior (do not mutate the list)."""
+    return state.npcs_by_behavior.get(behavior, [])
+
+
+def find_npc(state: State, behavior: str | None = None, name: str | None = None) -> Entity | None:
+    """First npc with the given behavior, else the first with the given name."""
+    if behavior is not None:
+        found = state.npcs_by_behavior.get(behavior)
+        if found:
+            return found[0]
+    if name is not None:
+        found = state.npcs_by_name.get(name)
+        if found:
+            return found[0]
+    return None
+
+
+def add_npc(state: State, entity: Entity) -> None:
+    state.npcs.append(entity)
+    _occupy(state, entity)
+    _bucket(state, entity)
+    schedule(state.scheduler, entity, action_delay(entity))
+
+
+def remove_npc(state: State, entity: Entity) -> None:
+    """Despawn an NPC from the current map (no-op if it is already gone)."""
+    try:
+        state.npcs.remove(entity)
+    except ValueError:
+        return
+    _vacate(state, entity)
+    _unbucket(state.npcs_by_behavior, entity.behavior, entity)
+    _unbucket(state.npcs_by_name, entity.name, entity)
+    unschedule(state.scheduler, entity)
+
+
+def set_behavior(state: State, entity: Entity, behavior: str | None) -> None:
+    """Change an npc's behavior (e.g. a sleeping bear waking), keeping buckets in sync."""
+    if entity.behavior == behavior:
+        return
+    _unbucket(state.npcs_by_behavior, entity.behavior, entity)
+    entity.behavior = behavior
+    state.npcs_by_behavior.setdefault(behavior, []).append(entity)
+    schedule(state.scheduler, entity, action_delay(entity))
+
+
+def set_entity_pos(state: State, entity: Entity, x: int, y: int) -> None:
+    """Move an entity without collision checks, keeping the occupancy map in sync."""
+    _vacate(state, entity)
+    entity.x = x
+    entity.y = y
+    _occupy(state, entity)
+
+
+def place_in_empty_cells(state: State, moves: Iterable[tuple[Entity, int, int]]) -> None:
+    """Bulk `set_entity_pos` for moves into empty cells.
+
+    Skips the per-cell list scans; used by the batched random walk, which only
+    ever steps into cells nobody occupied at the start of the pass. A move into
+    a cell that is not empty is refused (the entity stays put).
+    """
+    occ = state.occupancy
+    for e, x, y in moves:
+        if (x, y) in occ:
+            continue
+        old = (e.x, e.y)
+        here = occ.get(old)
+        if here is not None:
+            if len(here) == 1:
+                del occ[old]
+            else:
+                here[:] = [o for o in here if o is not e]
+        e.x = x
+        e.y = y
+        occ[(x, y)] = [e]
+
+
+def _occupy(state: State, entity: Entity) -> None:
+    state.occupancy.setdefault((entity.x, entity.y), []).append(entity)
+
+
+def _vacate(state: State, entity: Entity) -> None:
+    pos = (entity.x, entity.y)
+    here = state.occupancy.get(pos)
+    if not here:
+        return
+    for i, e in enumerate(here):
+        if e is entity:
+            del here[i]
+            break
+    if not here:
+        del state.occupancy[pos]
+
+
+def _bucket(state: State, entity: Entity) -> None:
+    state.npcs_by_behavior.setdefault(entity.behavior, []).append(entity)
+    state.npcs_by_name.setdefault(entity.name, []).append(entity)
+
+
+def _unbucket(buckets: dict, key: object, entity: Entity) -> None:
+    group = buckets.get(key)
+    if not group:
+        return
+    for i, e in enumerate(group):
+        if e is entity:
+            del group[i]
+            break
+    if not group:
+        del buckets[key]
@@ -0,0 +1,139 @@
+"""Catch-up simulation for maps the player is not on.
+
+Only the current map is simulated turn by turn. When the player leaves, the
+map's runtime (npcs, map-scoped flags, placed tiles and tile grids) is parked
+with the turn it was left. Coming back swaps those references back in instead
+of rebuilding the map: the dead stay dead, the wounded stay wounded, taken
+torches stay taken, and `on_load` does not run again. Parked grids are the only
+bulky part, so they form an LRU under `GRID_BUDGET` bytes; a map whose grids
+were dropped rebuilds them from its definition plus its parked tiles. The
+elapsed turns are then settled in one batch:
+
+- bunny spawning near a hut: the number of successful 5% rolls over the gap is
+  drawn directly (geometric waiting times), up to the global cap;
+- timed map flags count down by the elapsed turns, expiring as usual;
+- random walkers and ghosts drift to a random free cell about sqrt(turns) away,
+  the typical spread of a random walk; other enemies stay where they were left.
+
+Item timers need no catch-up: items only live in the player's inventory, which
+ticks every turn wherever the player is.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from csp.economy import BUNNY_CAP, BUNNY_SPAWN_CHANCE, spawn_bunny
+from csp.movement import can_move_to
+from csp.npc_index import find_npc, is_occupied, npcs_with_behavior, set_entity_pos
+
+if TYPE_CHECKING:
+    from csp.entities import Entity
+    from csp.state import State
+    from csp.tiles import Tile
+
+# Random picks tried per drifting walker before it stays put
+DRIFT_TRIES: int = 6
+# Bytes of parked tile grids kept; least recently left maps lose theirs first
+GRID_BUDGET: int = 8 << 20
+
+
+@dataclass
+class ParkedMap:
+    npcs: list[Entity] = field(default_factory=list)
+    flags_map: dict[str, int | None] = field(default_factory=dict)
+    # state.turn_count when the player left
+    turn: int = 0
+    map_tiles: dict[tuple[int, int], Tile] = field(default_factory=dict)
+    # Tile grids as left (see csp.tilegrid); None once dropped for the budget
+    tile_kinds: bytearray | None = None
+    collision: bytearray | None = None
+
+
+def park_map(state: State) -> None:
+    """Stash the current map's runtime before another map loads."""
+    if state.current_map_id is None:
+        return
+    # Re-inserted at the end, so the dict runs from least to most recently left
+    state.parked_maps[state.current_map_id] = ParkedMap(
+        npcs=state.npcs,
+        flags_map=state.flags_map,
+        turn=state.turn_count,
+        map_tiles=state.map_tiles,
+        tile_kinds=state.tile_kinds,
+        collision=state.collision,
+    )
+    _trim_grids(state.parked_maps)
+
+
+def drop_parked_grid(state: State, map_id: str) -> None:
+    """Forget a parked map's grids, e.g. after its definition changed under it."""
+    parked = state.parked_maps.get(map_id)
+    if parked is not None:
+        parked.tile_kinds = parked.collision = None
+
+
+def _trim_grids(parked_maps: dict[str, ParkedMap]) -> None:
+    total = sum(len(p.tile_kinds) * 2 for p in parked_maps.values() if p.tile_kinds is not None)
+    for p in parked_maps.values():
+        if total <= GRID_BUDGET:
+            break
+        if p.tile_kinds is not None:
+            total -= len(p.tile_kinds) * 2
+            p.tile_kinds = p.collision = None
+
+
+def catch_up(state: State, elapsed: int) -> None:
+    """Advance the freshly restored current map by `elapsed` unplayed turns."""
+    if elapsed <= 0:
+        return
+    _catch_up_flags(state.flags_map, elapsed)
+    _catch_up_bunnies(state, elapsed)
+    radius = min(math.isqrt(elapsed), max(state.map_cols, state.map_rows))
+    if radius > 0:
+        for e in list(npcs_with_behavior(state, "random")):
+            _drift(state, e, radius, through_walls=False)
+        for e in list(npcs_with_behavior(state, "phase")):
+            _drift(state, e, radius, through_walls=True)
+
+
+def _catch_up_flags(store: dict[str, int | None], elapsed: int) -> None:
+    for k, v in list(store.items()):
+        if v is None:
+            continue
+        if v - elapsed <= 0:
+            store.pop(k, None)
+        else:
+            store[k] = v - elapsed
+
+
+def _catch_up_bunnies(state: State, elapsed: int) -> None:
+    if find_npc(state, behavior="hut", name="Bunny Hut") is None:
+        return
+    # Walk the gaps between successful rolls instead of rolling every turn
+    log_miss = math.log(1.0 - BUNNY_SPAWN_CHANCE)
+    t = 0
+    while state.bunnies_spawned < BUNNY_CAP:
+        t += int(math.log(1.0 - random.random()) / log_miss) + 1
+        if t > elapsed:
+            break
+        if spawn_bunny(state):
+            state.bunnies_spawned += 1
+
+
+def _drift(state: State, e: Entity, radius: int, *, through_walls: bool) -> None:
+    for _ in range(DRIFT_TRIES):
+        x = e.x + random.randint(-radius, radius)
+        y = e.y + random.randint(-radius, radius)
+        if not (0 <= x < state.map_cols and 0 <= y < state.map_rows):
+            continue
+        if through_walls:
+            ok = not is_occupied(state, x, y)
+        else:
+            ok = can_move_to(state, x, y)
+        if ok:
+            set_entity_pos(state, e, x, y)
+            return
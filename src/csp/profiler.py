@@ -0,0 +1,105 @@
+"""Per-frame phase timings for the in-game profiler overlay.
+
+Code wraps work in `with phase(state, "name"):`; times are exclusive (a nested
+phase is not counted in its parent) and summed per frame. Finished frames go
+into a fixed-size ring buffer that the overlay graphs and `dump_csv` writes
+out. When the profiler is disabled (the default, e.g. headless simulation)
+`phase` hands back a shared no-op context.
+"""
+
+from __future__ import annotations
+
+import csv
+import time
+from collections import deque
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from csp.state import State
+
+# Order is the stacking order in the overlay graph and the CSV column order
+PHASES: tuple[str, ...] = (
+    "input",
+    "triggers",
+    "enemy_ai",
+    "economy",
+    "flags",
+    "items",
+    "warp",
+    "draw_static",
+    "draw_entities",
+    "draw_debug",
+    "draw_ui",
+    "lighting",
+    "draw_other",
+    "display",
+)
+_INDEX = {name: i for i, name in enumerate(PHASES)}
+_NULL = nullcontext()
+
+
+@dataclass
+class FrameProfiler:
+    enabled: bool = False
+    # Each frame: per-phase milliseconds in PHASES order
+    frames: deque[tuple[float, ...]] = field(default_factory=lambda: deque(maxlen=240))
+    frames_recorded: int = 0
+    _cur: list[float] = field(default_factory=lambda: [0.0] * len(PHASES))
+    # Open phases: [index, start, time spent in nested phases]
+    _stack: list[list[float]] = field(default_factory=list)
+
+
+class _Phase:
+    __slots__ = ("idx", "prof")
+
+    def __init__(self, prof: FrameProfiler, idx: int) -> None:
+        self.prof = prof
+        self.idx = idx
+
+    def __enter__(self) -> None:
+        self.prof._stack.append([self.idx, time.perf_counter(), 0.0])
+
+    def __exit__(self, *exc: object) -> None:
+        stack = self.prof._stack
+        idx, start, child = stack.pop()
+        elapsed = time.perf_counter() - start
+        self.prof._cur[int(idx)] += (elapsed - child) * 1000.0
+        if stack:
+            stack[-1][2] += elapsed
+
+
+def phase(state: State, name: str) -> AbstractContextManager[None]:
+    prof = state.profiler
+    if not prof.enabled:
+        return _NULL
+    return _Phase(prof, _INDEX[name])
+
+
+def end_frame(prof: FrameProfiler, keep: bool = True) -> None:
+    """Close the current frame; `keep=False` drops it (e.g. an idle wake-up)."""
+    if keep and prof.enabled:
+        prof.frames.append(tuple(prof._cur))
+        prof.frames_recorded += 1
+    prof._cur = [0.0] * len(PHASES)
+
+
+def phase_averages(prof: FrameProfiler) -> list[float]:
+    """Mean milliseconds per phase over the buffered frames."""
+    n = len(prof.frames)
+    if not n:
+        return [0.0] * len(PHASES)
+    return [sum(col) / n for col in zip(*prof.frames, strict=True)]
+
+
+def dump_csv(prof: FrameProfiler, path: Path) -> int:
+    """Write the buffered frames as CSV (one row per frame); returns rows written."""
+    with path.open("w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["frame", *PHASES, "total"])
+        first = prof.frames_recorded - len(prof.frames)
+        for i, row in enumerate(prof.frames):
+            w.writerow([first + i, *(f"{v:.4f}" for v in row), f"{sum(row):.4f}"])
+    return len(prof.frames)
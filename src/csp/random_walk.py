@@ -0,0 +1,93 @@
+"""Random-walk movement for `behavior="random"` critters (slimes, bunnies).
+
+Small groups take the plain per-entity path: one `random.choice` and
+`move_entity` each, in npc order. Large crowds (stress maps, long-lived bunny
+farms) are moved in a single NumPy pass when NumPy is installed (the optional
+`fast` extra):
+
+- every walker draws a direction at once, from a generator seeded off `random`
+  so `random.seed` still makes runs reproducible;
+- a step is dropped if it leaves the map, hits a collidable tile, or lands on a
+  cell that held any entity (walker or not, due this tick or not) at the start
+  of the pass;
+- when several walkers pick the same free cell, the first in npc order wins.
+
+Walkers do not step into cells vacated in the same pass, so a packed crowd
+loosens a little slower than with the sequential loop.
+"""
+
+from __future__ import annotations
+
+import random
+from typing import TYPE_CHECKING
+
+from csp.movement import move_entity
+from csp.npc_index import place_in_empty_cells
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from csp.entities import Entity
+    from csp.state import State
+else:
+    try:
+        import numpy as np
+    except ImportError:  # optional: pip install "CantSavePrincess[fast]"
+        np = None
+
+# Below this many walkers the NumPy setup costs more than it saves
+BATCH_MIN: int = 64
+
+_STEPS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+
+
+def random_walk(state: State, walkers: list[Entity]) -> None:
+    """Give each walker one random step (or none, if the step is blocked)."""
+    if np is None or len(walkers) < BATCH_MIN:
+        for e in walkers:
+            dx, dy = random.choice(_STEPS)
+            move_entity(state, e, dx, dy)
+        return
+    _random_walk_batch(state, walkers)
+
+
+def _random_walk_batch(state: State, walkers: list[Entity]) -> None:
+    cols, rows = state.map_cols, state.map_rows
+    n = len(walkers)
+    xs = np.fromiter((e.x for e in walkers), dtype=np.int64, count=n)
+    ys = np.fromiter((e.y for e in walkers), dtype=np.int64, count=n)
+    steps = np.array(_STEPS, dtype=np.int64)
+    rng = np.random.default_rng(random.getrandbits(64))
+    d = steps[rng.integers(0, len(_STEPS), size=n)]
+    tx = xs + d[:, 0]
+    ty = ys + d[:, 1]
+
+    ok = (tx >= 0) & (tx < cols) & (ty >= 0) & (ty < rows)
+    cand = np.flatnonzero(ok)
+    target = ty[cand] * cols + tx[cand]
+    # Collidable tiles and every occupied cell: the walkers' own, the player's, and
+    # those of npcs not acting this tick (other behaviors, walkers due later)
+    blocked = np.frombuffer(state.collision, dtype=np.uint8).astype(bool)
+    occ = np.fromiter(
+        (c for pos in state.occupancy for c in pos),
+        dtype=np.int64,
+        count=2 * len(state.occupancy),
+    )
+    ox, oy = occ[0::2], occ[1::2]
+    inside = (ox >= 0) & (ox < cols) & (oy >= 0) & (oy < rows)
+    blocked[(oy * cols + ox)[inside]] = True
+    free = ~blocked[target]
+    cand = cand[free]
+    target = target[free]
+    # Contested cells go to the first walker in npc order (np.unique keeps first index)
+    _, first = np.unique(target, return_index=True)
+    movers = cand[first]
+    place_in_empty_cells(
+        state,
+        (
+            (walkers[i], x, y)
+            for i, x, y in zip(
+                movers.tolist(), tx[movers].tolist(), ty[movers].tolist(), strict=True
+            )
+        ),
+    )
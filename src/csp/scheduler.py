@@ -0,0 +1,116 @@
+"""Energy-based turn order for the current map's npcs.
+
+Every npc has a `speed` (energy gained per player turn; `NORMAL_SPEED` = one
+ordinary action a turn). An action costs energy (`ACTION_COST` for a step, more
+for heavy moves such as a bite), so after acting the actor is due again
+`cost * NORMAL_SPEED // speed` ticks later, with one player turn worth `TURN`
+ticks. Due times live in a heap: a player turn advances the clock by `TURN` and
+pops only the actors due by then, so npcs that never act (traders, signs,
+sleeping bears) and slow actors cost nothing on the turns they sit out.
+Faster actors simply come up several times a turn; haste and slow are a
+`set_speed` call.
+
+Npcs due on the same tick share one heap entry (a bucket in scheduling
+order), so a crowd of same-speed walkers costs one heap push and pop a turn.
+Entries are invalidated lazily: each scheduled npc maps to the tick of its
+live entry, and bucket members whose tick no longer matches are dropped.
+"""
+
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from csp.entities import Entity
+    from csp.state import State
+
+NORMAL_SPEED: int = 100
+ACTION_COST: int = 100
+# Clock ticks per player turn
+TURN: int = 100
+
+# Behaviors that take actions; everything else is never scheduled
+ACTING_BEHAVIORS: frozenset[str] = frozenset({"random", "chase", "phase", "pig", "bear"})
+
+
+@dataclass
+class TurnScheduler:
+    now: int = 0
+    # Distinct due ticks (min-heap) and the npcs due on each, in scheduling order
+    heap: list[int] = field(default_factory=list)
+    buckets: dict[int, list[Entity]] = field(default_factory=dict)
+    # npc -> due tick of its live entry
+    live: dict[Entity, int] = field(default_factory=dict)
+
+
+def action_delay(entity: Entity, cost: int = ACTION_COST) -> int:
+    """Ticks until an npc that just spent `cost` energy may act again."""
+    return max(1, cost * NORMAL_SPEED // entity.speed)
+
+
+def schedule(sched: TurnScheduler, entity: Entity, delay: int) -> None:
+    """(Re)schedule an npc `delay` ticks from now, replacing any earlier entry."""
+    if entity.behavior not in ACTING_BEHAVIORS:
+        sched.live.pop(entity, None)
+        return
+    due = sched.now + delay
+    sched.live[entity] = due
+    bucket = sched.buckets.get(due)
+    if bucket is None:
+        sched.buckets[due] = [entity]
+        heapq.heappush(sched.heap, due)
+    else:
+        bucket.append(entity)
+
+
+def schedule_many(sched: TurnScheduler, entities: list[Entity], cost: int = ACTION_COST) -> None:
+    """`schedule` for a batch of acting npcs that each just spent `cost` (one bucket per speed)."""
+    speeds = {e.speed for e in entities}
+    for speed in speeds:
+        group = entities if len(speeds) == 1 else [e for e in entities if e.speed == speed]
+        due = sched.now + max(1, cost * NORMAL_SPEED // speed)
+        sched.live.update(dict.fromkeys(group, due))
+        bucket = sched.buckets.get(due)
+        if bucket is None:
+            sched.buckets[due] = list(group)
+            heapq.heappush(sched.heap, due)
+        else:
+            bucket.extend(group)
+
+
+def unschedule(sched: TurnScheduler, entity: Entity) -> None:
+    sched.live.pop(entity, None)
+
+
+def reset_schedule(sched: TurnScheduler, npcs: list[Entity]) -> None:
+    """Start a fresh order for a newly loaded map: everyone one action out, in npc order."""
+    sched.heap = []
+    sched.buckets = {}
+    sched.live = {}
+    for e in npcs:
+        schedule(sched, e, action_delay(e))
+
+
+def pop_due(sched: TurnScheduler, until: int) -> tuple[int, list[Entity]] | None:
+    """Pop the earliest tick at or before `until` with live npcs as (tick, npcs), else None."""
+    heap, live = sched.heap, sched.live
+    while heap and heap[0] <= until:
+        due = heapq.heappop(heap)
+        # Popped npcs keep their (now past) tick in `live` until rescheduled
+        actors = [e for e in sched.buckets.pop(due) if live.get(e) == due]
+        if actors:
+            return due, actors
+    return None
+
+
+def set_speed(state: State, entity: Entity, speed: int) -> None:
+    """Haste or slow an npc; the wait for its next action rescales to the new speed."""
+    sched = state.scheduler
+    old = entity.speed
+    entity.speed = max(1, speed)
+    due = sched.live.get(entity)
+    if due is None or due <= sched.now:
+        return
+    schedule(sched, entity, max(1, (due - sched.now) * old // entity.speed))
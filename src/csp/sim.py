@@ -0,0 +1,146 @@
+"""Headless turn simulation.
+
+Applies player actions to a `State` without touching the display, clock, event
+queue or mixer. The interactive loop in `csp.step` translates key presses into
+`Action`s and feeds them through `apply_action`; batch runs and replays can do
+the same without pygame I/O.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from csp.actions import perform_dialogue_action
+from csp.ai import enemy_ai
+from csp.chunks import stream_after_move
+from csp.combat import handle_combat
+from csp.common import Direction
+from csp.economy import update_economy
+from csp.flags import tick_flags
+from csp.interact import handle_interact
+from csp.items import tick_items_per_turn, use_item
+from csp.map_runtime import check_warp_after_move, load_map, process_triggers_after_move
+from csp.movement import move_entity
+from csp.profiler import phase
+from csp.state import GameMode, State
+
+
+@dataclass(frozen=True)
+class Action:
+    kind: str  # 'move' | 'punch' | 'interact' | 'use_item' | 'choose'
+    direction: Direction | None = None  # move target, or interact tie-break
+    item: str | None = None  # item name for 'use_item'
+    index: int = 0  # option index for 'choose'
+
+
+@dataclass(frozen=True)
+class Event:
+    kind: str  # 'turn' | 'blocked' | 'warp' | 'mode' | 'died' | 'message'
+    text: str = ""
+
+
+def new_game(state: State) -> None:
+    """Load the starting area; spawn slightly below center so we don't cover the sign."""
+    start = state.maps["start_area"].size
+    spawn = (start[0] // 2, min(start[1] - 2, start[1] // 2 + 2))
+    load_map(state, "start_area", spawn_pos=spawn)
+
+
+def player_move(state: State, direction: Direction) -> bool:
+    """Move the player one tile and, if the move succeeds, advance the world a turn."""
+    dx, dy = direction.value
+    if not move_entity(state, state.player, dx, dy):
+        return False
+    state.turn_count += 1
+    with phase(state, "triggers"):
+        process_triggers_after_move(state)
+    with phase(state, "enemy_ai"):
+        enemy_ai(state)
+    with phase(state, "economy"):
+        update_economy(state)
+    with phase(state, "warp"):
+        check_warp_after_move(state, direction)
+        stream_after_move(state)
+    with phase(state, "flags"):
+        tick_flags(state)
+    # Handle per-item timed effects (e.g., torch burn) after flags tick
+    with phase(state, "items"):
+        tick_items_per_turn(state)
+    return True
+
+
+def choose_dialogue_option(state: State, index: int) -> None:
+    tree = state.dialogues.get(state.dialogue_id or "")
+    if not tree:
+        state.mode = GameMode.PLAYING
+        return
+    nodes = tree.get("nodes", {})
+    node = nodes.get(state.dialogue_node or "")
+    if not node:
+        state.mode = GameMode.PLAYING
+        return
+    options = node.get("options", [])
+    if not (0 <= index < len(options)):
+        return
+    opt = options[index]
+    action = opt.get("action")
+    if action:
+        perform_dialogue_action(state, action)
+    nxt = opt.get("next")
+    if nxt:
+        state.dialogue_node = nxt
+        state.menu_dialogue_index = 0
+        node2 = nodes.get(state.dialogue_node, {})
+        if node2.get("end"):
+            state.mode = GameMode.PLAYING
+
+
+def apply_action(state: State, action: Action) -> list[Event]:
+    """Apply one player action and report what happened.
+
+    Actions that do not fit the current mode (e.g. moving while dead or while a
+    dialogue is open) are ignored and produce no events.
+    """
+    turn = state.turn_count
+    map_id = state.current_map_id
+    mode = state.mode
+    logged = state.messages_logged
+
+    if action.kind == "choose":
+        if state.mode != GameMode.DIALOGUE:
+            return []
+        choose_dialogue_option(state, action.index)
+    elif state.mode != GameMode.PLAYING:
+        return []
+    elif action.kind == "move":
+        if action.direction is None:
+            raise ValueError("move action requires a direction")
+        state.last_dir_key = action.direction
+        player_move(state, action.direction)
+    elif action.kind == "punch":
+        handle_combat(state)
+    elif action.kind == "interact":
+        handle_interact(state, action.direction or state.last_dir_key)
+    elif action.kind == "use_item":
+        if action.item:
+            use_item(state, action.item)
+    else:
+        raise ValueError(f"unknown action kind: {action.kind!r}")
+
+    events: list[Event] = []
+    if action.kind == "move" and state.turn_count == turn:
+        events.append(Event("blocked"))
+    if state.turn_count != turn:
+        events.append(Event("turn", str(state.turn_count)))
+    if state.current_map_id != map_id:
+        events.append(Event("warp", state.current_map_id or ""))
+    if state.mode != mode:
+        if state.mode == GameMode.DEAD:
+            events.append(Event("died"))
+        else:
+            events.append(Event("mode", state.mode.name))
+    new = min(state.messages_logged - logged, len(state.message_log))
+    if new > 0:
+        for text, _when in list(state.message_log)[-new:]:
+            events.append(Event("message", text))
+    return events
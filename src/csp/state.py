@@ -3,17 +3,31 @@ from __future__ import annotations
 from collections import deque
 from dataclasses import dataclass, field
 from enum import Enum, auto
+from typing import TYPE_CHECKING
 
 import pygame
 
 from csp.assets import asset_path
 from csp.tiles import Tile
 from csp.common import Direction
+from csp.dirty import DirtyTracker
+from csp.fov import FovCache
+from csp.layout import LogLayout
+from csp.lighting import LightMap
+from csp.pathfinding import DistanceField
+from csp.profiler import FrameProfiler
+from csp.scheduler import TurnScheduler
 from csp.dialogue import DialogueTree, initial_dialogues
 from csp.entities import Entity, Player
-from csp.maps import MapDef, Warp, initial_maps
+from csp.map_registry import load_maps
+from csp.maps import Warp
 from csp.shops import ShopItem
 
+if TYPE_CHECKING:
+    from csp.map_registry import MapRegistry
+    from csp.offscreen import ParkedMap
+    from csp.worldgraph import WorldGraph
+
 
 class GameMode(Enum):
     MAIN_MENU = auto()
@@ -66,7 +80,16 @@ class State:
     map_warps: dict[tuple[int, int], Warp] = field(default_factory=dict)
     map_cols: int = 0
     map_rows: int = 0
+    # World cell of map cell (0, 0); nonzero only on streamed maps (see csp.chunks)
+    stream_origin: tuple[int, int] = (0, 0)
     npcs: list[Entity] = field(default_factory=list)
+    # Position -> entities standing there (npcs + player); see csp.npc_index
+    occupancy: dict[tuple[int, int], list[Entity]] = field(default_factory=dict)
+    # Npcs bucketed by behavior and by name (player excluded); see csp.npc_index
+    npcs_by_behavior: dict[str | None, list[Entity]] = field(default_factory=dict)
+    npcs_by_name: dict[str, list[Entity]] = field(default_factory=dict)
+    # Due times of the npcs that act (see csp.scheduler)
+    scheduler: TurnScheduler = field(default_factory=TurnScheduler)
     turn_count: int = 0
 
     # Toggles
@@ -74,6 +97,10 @@ class State:
 
     # Basic in-game messages: list of (text, turn_when_added)
     message_log: deque[tuple[str, int]] = field(default_factory=lambda: deque(maxlen=50))
+    # Total messages ever logged (the log itself is bounded)
+    messages_logged: int = 0
+    # Pre-wrapped lines for the log panel (see csp.layout)
+    log_layout: LogLayout = field(default_factory=LogLayout)
 
     # Legacy simple shop items (unused by new shop view but kept for reference)
     shop_items: list[dict[str, object]] = field(default_factory=list)
@@ -83,6 +110,8 @@ class State:
 
     # High-level mode
     mode: GameMode = GameMode.MAIN_MENU
+    # Source of the hit that killed the player (e.g. "Pig bite"), for batch stats
+    death_cause: str | None = None
 
     # Menu selections
     menu_main_index: int = 0
@@ -125,14 +154,38 @@ class State:
     owned_items: dict[str, int] = field(default_factory=dict)  # item -> qty
     binds: dict[str, str] = field(default_factory=dict)  # key ('1'..'0') -> item name
 
-    # Maps registry
-    maps: dict[str, MapDef] = field(default_factory=initial_maps)
+    # Maps registry, built lazily per map (see csp.map_registry, csp.mapfiles)
+    maps: MapRegistry = field(default_factory=load_maps)
 
     # Debug shapes
     debug_shapes_on: bool = False
     debug_shapes: list[dict[str, object]] = field(default_factory=list)
-    # Runtime tiles for current map
+    # Frame-time profiler (recording is switched on by the interactive loop)
+    show_profiler: bool = False
+    profiler: FrameProfiler = field(default_factory=FrameProfiler)
+    # Runtime tiles for current map (placed/tagged tiles; walls live in the grids below)
     map_tiles: dict[tuple[int, int], Tile] = field(default_factory=dict)
+    # Dense per-map grids, index y * map_cols + x; see csp.tilegrid
+    tile_kinds: bytearray = field(default_factory=bytearray)
+    collision: bytearray = field(default_factory=bytearray)
+    # Bumped on every tile/grid change (map loads included)
+    tiles_version: int = 0
+    # Bumped when the whole grid is rewritten; single-cell edits go to tiles_dirty
+    grid_epoch: int = 0
+    tiles_dirty: set[tuple[int, int]] = field(default_factory=set)
+    # Cached steps-to-player over the collision grid (see csp.pathfinding)
+    player_field: DistanceField = field(default_factory=DistanceField)
+    # Shadowcast results per (origin, radius) for the current grid (see csp.fov)
+    fov_cache: FovCache = field(default_factory=FovCache)
+    # Light levels and darkness overlay for the current map (see csp.lighting)
+    light: LightMap = field(default_factory=LightMap)
+    # Pre-rendered walls/tile sprites/grid lines for the current map (see draw.py)
+    static_layer: pygame.Surface | None = None
+    static_layer_epoch: int = -1
+    # Set by input/turns; the loop only redraws (and otherwise idles) on change
+    needs_redraw: bool = True
+    # Regions painted last frame, for pygame.display.update(rects)
+    dirty: DirtyTracker = field(default_factory=DirtyTracker)
 
     # Movement repeat (only in PLAYING mode)
     move_repeat_interval_ms: int = 100  # ~10x per second
@@ -154,8 +207,13 @@ class State:
     # Flags system
     # Global flags: name -> remaining steps (None = permanent until unset)
     flags_global: dict[str, int | None] = field(default_factory=dict)
-    # Current map flags: name -> remaining steps (cleared on map load)
+    # Current map flags: name -> remaining steps (parked with the map on unload)
     flags_map: dict[str, int | None] = field(default_factory=dict)
+    # Npcs and map flags of maps the player left, by map id (see csp.offscreen)
+    parked_maps: dict[str, ParkedMap] = field(default_factory=dict)
+    # Warp graph with precomputed routes; None until needed or after a warp changes
+    # (see csp.worldgraph)
+    world_graph: WorldGraph | None = None
 
     def __post_init__(self) -> None:
         # Load sounds (optional)
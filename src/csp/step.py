@@ -1,11 +1,11 @@
 from __future__ import annotations
 
+from pathlib import Path
+
 import pygame
 
-from csp.actions import perform_dialogue_action
-from csp.ai import enemy_ai
-from csp.combat import handle_combat
 from csp.common import Direction
+from csp.dirty import collect_dirty, invalidate
 from csp.draw import (
     draw_dialogue,
     draw_frame,
@@ -14,15 +14,11 @@ from csp.draw import (
     draw_settings_menu,
     draw_shop_menu,
 )
-from csp.economy import update_economy
-from csp.flags import tick_flags, has_flag
-from csp.graphics import FPS
-from csp.interact import handle_interact
-from csp.items import use_item
-from csp.map_runtime import check_warp_after_move
-from csp.map_runtime import process_triggers_after_move
+from csp.graphics import FPS, IDLE_WAIT_MS
+from csp.mapfiles import reload_changed_maps
 from csp.messages import log
-from csp.movement import move_entity
+from csp.profiler import dump_csv, end_frame, phase
+from csp.sim import Action, apply_action, player_move
 from csp.state import GameMode, State
 
 
@@ -36,22 +32,8 @@ def _play_sound(state: State, key: str) -> None:
 
 
 def _do_player_move(state: State, direction: Direction) -> None:
-    dx, dy = direction.value
-
-    if move_entity(state, state.player, dx, dy):
-        state.turn_count += 1
-        process_triggers_after_move(state)
-        enemy_ai(state)
-        update_economy(state)
-        check_warp_after_move(state, direction)
-        tick_flags(state)
-        # Handle per-item timed effects (e.g., torch burn) after flags tick
-        try:
-            from csp.items import tick_items_per_turn
-
-            tick_items_per_turn(state)
-        except Exception:
-            pass
+    if player_move(state, direction):
+        state.needs_redraw = True
         state.move_repeat_last_time_ms = pygame.time.get_ticks()
         state.move_repeat_last_dir = direction.value
 
@@ -65,7 +47,7 @@ def process_inputs_playing(state: State, event: pygame.event.Event) -> None:
         state.menu_inventory_index = 0
         state.mode = GameMode.INVENTORY
     elif event.key == pygame.K_p:
-        handle_combat(state)
+        apply_action(state, Action("punch"))
     elif event.key == pygame.K_SPACE:
         # Interact can handle talk/shop/sign/switch/door; allow direction to break ties
         pressed = pygame.key.get_pressed()
@@ -78,14 +60,18 @@ def process_inputs_playing(state: State, event: pygame.event.Event) -> None:
             preferred = Direction.LEFT
         elif pressed[pygame.K_RIGHT]:
             preferred = Direction.RIGHT
-        if preferred is None:
-            preferred = state.last_dir_key
-        handle_interact(state, preferred)
+        apply_action(state, Action("interact", direction=preferred))
     elif event.key == pygame.K_d:
         state.debug_shapes_on = not state.debug_shapes_on
-        from csp.messages import log
-
         log(state, f"Debug shapes: {'on' if state.debug_shapes_on else 'off'}.")
+    elif event.key == pygame.K_f:
+        if event.mod & pygame.KMOD_SHIFT:
+            path = Path("frame_times.csv")
+            n = dump_csv(state.profiler, path)
+            log(state, f"Wrote {n} frame timings to {path}.")
+        else:
+            state.show_profiler = not state.show_profiler
+            log(state, f"Profiler overlay: {'on' if state.show_profiler else 'off'}.")
     elif event.key in (
         pygame.K_UP,
         pygame.K_DOWN,
@@ -127,7 +113,7 @@ def process_inputs_playing(state: State, event: pygame.event.Event) -> None:
         slot = key_map[event.key]
         item = state.binds.get(slot)
         if item:
-            use_item(state, item)
+            apply_action(state, Action("use_item", item=item))
 
 
 def process_inputs_main_menu(state: State, event: pygame.event.Event) -> bool:
@@ -301,108 +287,146 @@ def process_inputs_dialogue(state: State, event: pygame.event.Event) -> None:
             _play_sound(state, "bow")
     elif event.key in (pygame.K_RETURN, pygame.K_SPACE):
         if options:
-            opt = options[state.menu_dialogue_index]
-            action = opt.get("action")
-            if action:
-                perform_dialogue_action(state, action)
-            nxt = opt.get("next")
-            if nxt:
-                state.dialogue_node = nxt
-                state.menu_dialogue_index = 0
-                node2 = nodes.get(state.dialogue_node, {})
-                if node2.get("end"):
-                    state.mode = GameMode.PLAYING
+            apply_action(state, Action("choose", index=state.menu_dialogue_index))
     elif event.key == pygame.K_ESCAPE:
         if tree.get("backoutable", True):
             state.mode = GameMode.PLAYING
 
 
+_REDRAW_EVENTS = frozenset(
+    (pygame.KEYDOWN, pygame.KEYUP, pygame.QUIT, pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED)
+)
+
+
 def step_loop(state: State, screen, font) -> None:
     clock = state.clock
     running = True
+    drawn_mode: GameMode | None = None
+    idle = False
+    state.needs_redraw = True
+    state.profiler.enabled = True
     while running:
-        if state.mode == GameMode.MAIN_MENU:
-            draw_main_menu(state, screen, font)
-        elif state.mode == GameMode.SETTINGS:
-            draw_settings_menu(state, screen, font)
-        elif state.mode == GameMode.SHOP:
-            draw_shop_menu(state, screen, font)
-        elif state.mode == GameMode.INVENTORY:
-            draw_inventory_menu(state, screen, font)
-        elif state.mode == GameMode.DIALOGUE:
-            draw_dialogue(state, screen, font)
+        if idle:
+            # Nothing changing on screen: sleep until input arrives (or the timeout passes)
+            first = pygame.event.wait(IDLE_WAIT_MS)
+            events = [first, *pygame.event.get()] if first.type != pygame.NOEVENT else []
         else:
-            draw_frame(state, screen, font)
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif (
-                event.type == pygame.KEYDOWN
-                and (event.key == pygame.K_q)
-                and (event.mod & pygame.KMOD_CTRL)
-            ):
-                # Dev-time super quit
-                running = False
-            else:
+            events = pygame.event.get()
+
+        with phase(state, "input"):
+            for event in events:
+                # Only input the handlers act on can change the screen; mouse motion,
+                # focus changes and the like must not pull the loop out of idle
+                if event.type in _REDRAW_EVENTS:
+                    state.needs_redraw = True
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    invalidate(state.dirty)
+                elif (
+                    event.type == pygame.KEYDOWN
+                    and (event.key == pygame.K_q)
+                    and (event.mod & pygame.KMOD_CTRL)
+                ):
+                    # Dev-time super quit
+                    running = False
+                else:
+                    if state.mode == GameMode.MAIN_MENU:
+                        if process_inputs_main_menu(state, event):
+                            running = False
+                    elif state.mode == GameMode.SETTINGS:
+                        process_inputs_settings(state, event)
+                    elif state.mode == GameMode.SHOP:
+                        process_inputs_shop(state, event)
+                    elif state.mode == GameMode.INVENTORY:
+                        process_inputs_inventory(state, event)
+                    elif state.mode == GameMode.DIALOGUE:
+                        process_inputs_dialogue(state, event)
+                    elif state.mode == GameMode.DEAD:
+                        process_inputs_dead(state, event)
+                    else:
+                        # Running toggle + message
+                        if event.type == pygame.KEYDOWN and event.key in (
+                            pygame.K_LCTRL,
+                            pygame.K_RCTRL,
+                        ):
+                            if not state.run_active:
+                                state.run_active = True
+                                log(state, "Hero begins running.")
+                        elif event.type == pygame.KEYUP and event.key in (
+                            pygame.K_LCTRL,
+                            pygame.K_RCTRL,
+                        ):
+                            if state.run_active:
+                                state.run_active = False
+                                log(state, "Hero stops running.")
+                        process_inputs_playing(state, event)
+
+            # Handle held-move repeat in PLAYING mode
+            dir_key: Direction | None = None
+            if state.mode == GameMode.PLAYING:
+                pressed = pygame.key.get_pressed()
+                if pressed[pygame.K_UP]:
+                    dir_key = Direction.UP
+                elif pressed[pygame.K_DOWN]:
+                    dir_key = Direction.DOWN
+                elif pressed[pygame.K_LEFT]:
+                    dir_key = Direction.LEFT
+                elif pressed[pygame.K_RIGHT]:
+                    dir_key = Direction.RIGHT
+
+                if dir_key is not None:
+                    now = pygame.time.get_ticks()
+                    interval = state.move_repeat_interval_ms
+                    if pressed[pygame.K_LCTRL] or pressed[pygame.K_RCTRL]:
+                        interval = max(1, interval // 2)
+                    # If direction changed since last repeat, allow immediate move
+                    if state.move_repeat_last_dir != dir_key.value:
+                        _do_player_move(state, dir_key)
+                    elif now - state.move_repeat_last_time_ms >= interval:
+                        _do_player_move(state, dir_key)
+                else:
+                    state.move_repeat_last_dir = None
+
+        # Map files edited while the game runs replace their maps (see csp.mapfiles)
+        if reload_changed_maps(state):
+            invalidate(state.dirty)
+            state.needs_redraw = True
+
+        # A mode switch repaints a different screen layout; push all of it
+        if state.mode != drawn_mode:
+            invalidate(state.dirty)
+            drawn_mode = state.mode
+            state.needs_redraw = True
+
+        # The overlay graphs live frame times, so keep frames coming while it is up
+        drew = state.needs_redraw or state.show_profiler
+        if drew:
+            with phase(state, "draw_other"):
                 if state.mode == GameMode.MAIN_MENU:
-                    if process_inputs_main_menu(state, event):
-                        running = False
+                    draw_main_menu(state, screen, font)
                 elif state.mode == GameMode.SETTINGS:
-                    process_inputs_settings(state, event)
+                    draw_settings_menu(state, screen, font)
                 elif state.mode == GameMode.SHOP:
-                    process_inputs_shop(state, event)
+                    draw_shop_menu(state, screen, font)
                 elif state.mode == GameMode.INVENTORY:
-                    process_inputs_inventory(state, event)
+                    draw_inventory_menu(state, screen, font)
                 elif state.mode == GameMode.DIALOGUE:
-                    process_inputs_dialogue(state, event)
-                elif state.mode == GameMode.DEAD:
-                    process_inputs_dead(state, event)
+                    draw_dialogue(state, screen, font)
                 else:
-                    # Running toggle + message
-                    if event.type == pygame.KEYDOWN and event.key in (
-                        pygame.K_LCTRL,
-                        pygame.K_RCTRL,
-                    ):
-                        if not state.run_active:
-                            state.run_active = True
-                            log(state, "Hero begins running.")
-                    elif event.type == pygame.KEYUP and event.key in (
-                        pygame.K_LCTRL,
-                        pygame.K_RCTRL,
-                    ):
-                        if state.run_active:
-                            state.run_active = False
-                            log(state, "Hero stops running.")
-                    process_inputs_playing(state, event)
-
-        # Handle held-move repeat in PLAYING mode
-        if state.mode == GameMode.PLAYING:
-            pressed = pygame.key.get_pressed()
-            dir_key: Direction | None = None
-            if pressed[pygame.K_UP]:
-                dir_key = Direction.UP
-            elif pressed[pygame.K_DOWN]:
-                dir_key = Direction.DOWN
-            elif pressed[pygame.K_LEFT]:
-                dir_key = Direction.LEFT
-            elif pressed[pygame.K_RIGHT]:
-                dir_key = Direction.RIGHT
-
-            if dir_key is not None:
-                now = pygame.time.get_ticks()
-                interval = state.move_repeat_interval_ms
-                if pressed[pygame.K_LCTRL] or pressed[pygame.K_RCTRL]:
-                    interval = max(1, interval // 2)
-                # If direction changed since last repeat, allow immediate move
-                if state.move_repeat_last_dir != dir_key.value:
-                    _do_player_move(state, dir_key)
-                elif now - state.move_repeat_last_time_ms >= interval:
-                    _do_player_move(state, dir_key)
-            else:
-                state.move_repeat_last_dir = None
-
-        pygame.display.flip()
-        clock.tick(FPS)
+                    draw_frame(state, screen, font)
+            # Push only the regions whose content changed since the last frame
+            with phase(state, "display"):
+                rects = collect_dirty(state.dirty)
+                if rects:
+                    pygame.display.update(rects)
+            state.needs_redraw = False
+        # Idle wake-ups with nothing to draw are not frames
+        end_frame(state.profiler, keep=drew)
+
+        # Keep ticking at full rate while a move key is held (repeat timing)
+        idle = dir_key is None and not state.show_profiler
+        if not idle:
+            clock.tick(FPS)
 
     pygame.quit()
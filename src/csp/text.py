@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+import pygame
+
+if TYPE_CHECKING:
+    from functools import _CacheInfo
+
+# Distinct (font, text, color, antialias) surfaces kept around; the UI shows a
+# few hundred at most, so this comfortably covers a frame plus recent history.
+TEXT_CACHE_SIZE: int = 1024
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def render_text(
+    font: pygame.font.Font,
+    text: str,
+    color: tuple[int, ...],
+    antialias: bool = True,
+) -> pygame.Surface:
+    """Rasterize a line of text, reusing the surface while it stays in the LRU.
+
+    The returned surface is shared between callers: blit it, never draw on it.
+    """
+    return font.render(text, antialias, color)
+
+
+def text_cache_info() -> _CacheInfo:
+    """Hit/miss/size counters for the text surface cache."""
+    return render_text.cache_info()
@@ -0,0 +1,121 @@
+"""Dense per-map tile grid.
+
+`load_map` keeps two `bytearray`s sized `map_cols * map_rows` (index `y * cols + x`):
+
+- `state.tile_kinds`: interned tile-kind id per cell (0 = bare floor)
+- `state.collision`: 1 where a tile blocks movement
+
+Walls only live in the grid. `state.map_tiles` still holds the rarer placed tiles
+(torches, leaves, rocks, furniture...) so responders can inspect their tags; every
+change to those after load must go through `set_tile` so the grid stays in sync.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from csp.maps import unpack_grid
+from csp.state import State
+from csp.tiles import Tile
+
+WALL = Tile(name="Wall", sprite=None, collidable=True, tag="wall")
+
+# Kind id -> shared prototype tile (treat as read-only). Id 0 is bare floor.
+TILE_KINDS: list[Tile] = [Tile(name="Floor")]
+_KIND_IDS: dict[tuple[str, str | None, bool, str | None], int] = {}
+
+
+def kind_id(tile: Tile) -> int:
+    """Intern a tile's look/collision and return its kind id."""
+    key = (tile.name, tile.sprite, tile.collidable, tile.tag)
+    kid = _KIND_IDS.get(key)
+    if kid is None:
+        kid = len(TILE_KINDS)
+        if kid > 255:
+            raise ValueError("too many distinct tile kinds for a byte grid")
+        TILE_KINDS.append(Tile(tile.name, tile.sprite, tile.collidable, tile.tag))
+        _KIND_IDS[key] = kid
+    return kid
+
+
+def wall_tile(sprite: str | None) -> Tile:
+    """The wall tile drawn with `sprite` (the plain WALL for None)."""
+    if sprite is None:
+        return WALL
+    return Tile(name="Wall", sprite=sprite, collidable=True, tag="wall")
+
+
+def reset_tile_grid(
+    state: State,
+    walls: Iterable[tuple[int, int]],
+    packed: bytes | bytearray | None = None,
+    wall_sprite: str | None = None,
+) -> None:
+    """Allocate fresh grids for the current map size with `walls` filled in.
+
+    `packed` is an optional wall bitmap (`MapDef.wall_bits`) laid down first;
+    walls are drawn with `wall_sprite` if given.
+    """
+    cols = state.map_cols
+    n = cols * state.map_rows
+    wall = kind_id(wall_tile(wall_sprite))
+    if packed is not None:
+        coll = unpack_grid(packed, cols, state.map_rows)
+        kinds = coll.translate(bytes((0, wall)) + bytes(254))
+    else:
+        kinds = bytearray(n)
+        coll = bytearray(n)
+    for x, y in walls:
+        i = y * cols + x
+        kinds[i] = wall
+        coll[i] = 1
+    state.tile_kinds = kinds
+    state.collision = coll
+    state.tiles_dirty.clear()
+    _touch_all(state)
+
+
+def install_tile_grid(state: State, kinds: bytearray, collision: bytearray) -> None:
+    """Adopt prebuilt grids for the current map size (e.g. a streamed window)."""
+    state.tile_kinds = kinds
+    state.collision = collision
+    state.tiles_dirty.clear()
+    _touch_all(state)
+
+
+def bake_map_tiles(state: State) -> None:
+    """Stamp every tile currently in state.map_tiles into the grid (used after on_load)."""
+    cols = state.map_cols
+    for (x, y), tile in state.map_tiles.items():
+        i = y * cols + x
+        state.tile_kinds[i] = kind_id(tile)
+        state.collision[i] = 1 if tile.collidable else 0
+    _touch_all(state)
+
+
+def set_tile(state: State, pos: tuple[int, int], tile: Tile | None) -> None:
+    """Place (or with None, clear to floor) the tile at pos on the current map."""
+    x, y = pos
+    i = y * state.map_cols + x
+    if tile is None:
+        state.map_tiles.pop(pos, None)
+        state.tile_kinds[i] = 0
+        state.collision[i] = 0
+    else:
+        state.map_tiles[pos] = tile
+        state.tile_kinds[i] = kind_id(tile)
+        state.collision[i] = 1 if tile.collidable else 0
+    state.tiles_version += 1
+    state.tiles_dirty.add(pos)
+
+
+def is_blocked(state: State, x: int, y: int) -> bool:
+    """True if (x, y) is off-map or holds a collidable tile."""
+    if not (0 <= x < state.map_cols and 0 <= y < state.map_rows):
+        return True
+    return state.collision[y * state.map_cols + x] != 0
+
+
+def _touch_all(state: State) -> None:
+    state.tiles_version += 1
+    state.grid_epoch += 1
@@ -0,0 +1,217 @@
+"""How the maps connect: a graph over warps with precomputed routes.
+
+Nodes are (map id, cell) pairs of two kinds: gates (cells holding a warp) and
+arrivals (cells a warp drops the player on). Each warp is an edge from its gate
+to its arrival costing one step; inside a map, each arrival has an edge to every
+gate it can walk to, costing the walk's length (a BFS over the map's walls and
+collidable tiles; streamed maps, which have no fixed layout, use the Manhattan
+distance). Npcs are ignored.
+
+`world_graph(state)` builds the graph once and runs Dijkstra from every gate,
+storing the best route from each gate, and from each map, to every other map.
+After that, `route` and `gate_route` are dict lookups. The graph is kept on the
+state until `invalidate_world_graph` is called (when a warp is added at runtime
+or a map file is reloaded). Building it looks up every map, one at a time: the
+first pass keeps only each map's warp table, the second rebuilds the maps warps
+lead into for their walks, and idle definitions are evicted after each lookup
+(see csp.map_registry), so the graph does not keep the registry built.
+"""
+
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from csp.map_registry import MapRegistry, evict_idle_maps
+from csp.maps import MapDef, Warp, unpack_grid
+from csp.pathfinding import flood_distances
+
+if TYPE_CHECKING:
+    from csp.state import State
+
+Node = tuple[str, tuple[int, int]]
+
+
+@dataclass(frozen=True)
+class Route:
+    # Steps, counting one per warp taken; walking to the first gate is not included
+    cost: int
+    # Gates to step onto in order, as (map id, cell); the first is on the start map
+    gates: tuple[Node, ...]
+
+
+@dataclass
+class WorldGraph:
+    # Node -> [(neighbor, cost)]
+    edges: dict[Node, list[tuple[Node, int]]] = field(default_factory=dict)
+    # Map id -> its arrival cells, in warp order
+    arrivals: dict[str, list[tuple[int, int]]] = field(default_factory=dict)
+    # (gate, target map id) -> best route leaving through that gate
+    from_gate: dict[tuple[Node, str], Route] = field(default_factory=dict)
+    # (map id, target map id) -> best route over the map's gates
+    routes: dict[tuple[str, str], Route] = field(default_factory=dict)
+
+
+def world_graph(state: State) -> WorldGraph:
+    """The (cached) warp graph of all maps."""
+    graph = state.world_graph
+    if graph is None:
+        graph = state.world_graph = build_world_graph(state.maps, keep=state.current_map_id)
+    return graph
+
+
+def invalidate_world_graph(state: State) -> None:
+    state.world_graph = None
+
+
+def route(state: State, from_map: str, to_map: str) -> Route | None:
+    """Best route from anywhere on `from_map` to `to_map` (None if there is none)."""
+    if from_map == to_map:
+        return Route(0, ())
+    return world_graph(state).routes.get((from_map, to_map))
+
+
+def gate_route(state: State, map_id: str, gate: tuple[int, int], to_map: str) -> Route | None:
+    """Best route to `to_map` that starts by taking the warp at `gate` on `map_id`."""
+    return world_graph(state).from_gate.get(((map_id, gate), to_map))
+
+
+def next_gate(state: State, to_map: str) -> tuple[int, int] | None:
+    """The gate on the current map to head for to reach `to_map` (in map cells)."""
+    map_id = state.current_map_id
+    if map_id is None or map_id == to_map:
+        return None
+    graph = world_graph(state)
+    # Gates are keyed by map cell (world cell on streamed maps)
+    ox, oy = state.stream_origin
+    px, py = state.player.x + ox, state.player.y + oy
+    best: tuple[int, tuple[int, int]] | None = None
+    for gate in state.maps[map_id].warps:
+        r = graph.from_gate.get(((map_id, gate), to_map))
+        if r is None:
+            continue
+        # Current-map leg estimated; the player is usually in open ground
+        cost = abs(gate[0] - px) + abs(gate[1] - py) + r.cost
+        if best is None or cost < best[0]:
+            best = (cost, gate)
+    return None if best is None else best[1]
+
+
+def build_world_graph(maps: MapRegistry, keep: str | None = None) -> WorldGraph:
+    """Build the graph of every map in `maps`, evicting idle ones as it goes (never `keep`)."""
+    graph = WorldGraph()
+    edges = graph.edges
+    tables: dict[str, dict[tuple[int, int], Warp]] = {}
+    streamed: set[str] = set()
+    for map_id in list(maps):
+        m = maps[map_id]
+        tables[map_id] = dict(m.warps)
+        if m.stream is not None:
+            streamed.add(map_id)
+        evict_idle_maps(maps, keep)
+    gates: dict[str, list[tuple[int, int]]] = {k: list(t) for k, t in tables.items()}
+    for map_id, table in tables.items():
+        for pos, w in table.items():
+            if w.target_map_id not in tables:
+                continue
+            arrival = (w.target_map_id, w.target_pos)
+            edges.setdefault((map_id, pos), []).append((arrival, 1))
+            spots = graph.arrivals.setdefault(w.target_map_id, [])
+            if w.target_pos not in spots:
+                spots.append(w.target_pos)
+    for map_id, spots in graph.arrivals.items():
+        if map_id in streamed:
+            walks = [_manhattan_walks(spot, gates[map_id]) for spot in spots]
+        else:
+            m = maps[map_id]
+            coll = _collision(m)
+            walks = [_walks(coll, *m.size, spot, gates[map_id]) for spot in spots]
+            evict_idle_maps(maps, keep)
+        for spot, walk in zip(spots, walks, strict=True):
+            out = edges.setdefault((map_id, spot), [])
+            for gate, steps in walk:
+                out.append(((map_id, gate), steps))
+
+    for map_id, map_gates in gates.items():
+        for gate in map_gates:
+            start = (map_id, gate)
+            if start not in edges:
+                continue
+            for target, r in _routes_from(edges, start).items():
+                if target == map_id:
+                    continue
+                graph.from_gate[(start, target)] = r
+                best = graph.routes.get((map_id, target))
+                if best is None or r.cost < best.cost:
+                    graph.routes[(map_id, target)] = r
+    return graph
+
+
+def _walks(
+    coll: bytearray, cols: int, rows: int, spot: tuple[int, int], gates: list[tuple[int, int]]
+) -> list[tuple[tuple[int, int], int]]:
+    """(gate, steps) for each gate walkable from `spot` over the collision grid `coll`."""
+    if not (0 <= spot[0] < cols and 0 <= spot[1] < rows):
+        return []
+    dist = flood_distances(coll, cols, rows, spot[1] * cols + spot[0])
+    out = []
+    for x, y in gates:
+        if 0 <= x < cols and 0 <= y < rows and dist[y * cols + x] >= 0:
+            out.append(((x, y), dist[y * cols + x]))
+    return out
+
+
+def _manhattan_walks(
+    spot: tuple[int, int], gates: list[tuple[int, int]]
+) -> list[tuple[tuple[int, int], int]]:
+    # Streamed maps have no fixed layout to walk
+    return [(g, abs(g[0] - spot[0]) + abs(g[1] - spot[1])) for g in gates]
+
+
+def _collision(m: MapDef) -> bytearray:
+    cols, rows = m.size
+    if m.wall_bits is not None:
+        coll = unpack_grid(m.wall_bits, cols, rows)
+    else:
+        coll = bytearray(cols * rows)
+    solid = set(m.walls) | m.solid_tiles
+    solid.update(pos for pos, t in m.tiles.items() if t.collidable)
+    for x, y in solid:
+        coll[y * cols + x] = 1
+    # Gates are walkable even when a wall sits under the warp
+    for x, y in m.warps:
+        if 0 <= x < cols and 0 <= y < rows:
+            coll[y * cols + x] = 0
+    return coll
+
+
+def _routes_from(edges: dict[Node, list[tuple[Node, int]]], start: Node) -> dict[str, Route]:
+    """Dijkstra from a gate: the cheapest route into each other map."""
+    dist = {start: 0}
+    prev: dict[Node, Node] = {}
+    best: dict[str, Node] = {}
+    heap = [(0, start)]
+    while heap:
+        d, node = heapq.heappop(heap)
+        if d > dist[node]:
+            continue
+        map_id = node[0]
+        # The first node reached on a map is an arrival on its cheapest route
+        best.setdefault(map_id, node)
+        for nxt, cost in edges.get(node, ()):
+            nd = d + cost
+            if nd < dist.get(nxt, nd + 1):
+                dist[nxt] = nd
+                prev[nxt] = node
+                heapq.heappush(heap, (nd, nxt))
+    out = {}
+    for map_id, node in best.items():
+        path = []
+        cur = node
+        while cur != start:
+            cur = prev[cur]
+            if cur in edges and any(nxt[0] != cur[0] for nxt, _ in edges[cur]):
+                path.append(cur)
+        out[map_id] = Route(dist[node], tuple(reversed(path)))
+    return out